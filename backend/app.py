@@ -1,114 +1,448 @@
 #!/usr/bin/env python3
 # backend/app.py
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
-import requests, re
+import contextvars, os, threading, time
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from cache import LRUCache, ResultCache, TTLCache
+from fragments import RowFragments
+from problem_index import GROUP_MODES, IndexDelta, ProblemIndex, diff
+from recommend import DEFAULT_LIMIT, RECOMMENDED, Ratings
+from shared_snapshot import MappedSnapshot
+from submissions import SolvedSets
+import codeforces
+import metrics
+import recommend
+import responses
+import snapshot
+import upstream
+from scheduler import scheduler
 
 app = Flask(__name__)
-CORS(app)
+CORS(app, expose_headers=["X-Total-Count", "Server-Timing", "ETag"])
 
-PROBLEMS_URL = "https://codeforces.com/api/problemset.problems"
-CONTESTS_URL = "https://codeforces.com/api/contest.list"
-USER_SUBMISSIONS_URL = "https://codeforces.com/api/user.status"
-
-_div_re = re.compile(r"div(?:\.|\s)?\s*([1-4])", flags=re.I)
+# contest.list / problemset.problems change a few times a day; keep them in memory
+CACHE_TTL = int(os.environ.get("CF_CACHE_TTL", 3600))
+# last good copy on disk, shared with the CLI; loaded at startup so a fresh worker can serve immediately
+SNAPSHOT_PATH = snapshot.DEFAULT_PATH
+# optional: path of a memory-mapped index shared by all workers on the host (see shared_snapshot.py)
+SHARED_SNAPSHOT_PATH = os.environ.get("CF_SHARED_SNAPSHOT")
 
 def fetch_contests():
-    r = requests.get(CONTESTS_URL, params={"gym": False}, timeout=60)
-    r.raise_for_status()
-    data = r.json()
-    if data.get("status") != "OK":
-        raise RuntimeError("Failed to fetch contests")
-    return {c["id"]: c.get("name", "") for c in data["result"]}
+    contests = codeforces.download_contests()
+    snapshot.store(SNAPSHOT_PATH, "contests", contests)
+    return codeforces.contest_map_from(contests)
 
 def fetch_problemset():
-    r = requests.get(PROBLEMS_URL, timeout=60)
-    r.raise_for_status()
-    data = r.json()
-    if data.get("status") != "OK":
-        raise RuntimeError("Failed to fetch problems")
-    problems = data["result"]["problems"]
-    stats = data["result"].get("problemStatistics", [])
-    solved_map = {(s["contestId"], s["index"]): s.get("solvedCount", 0) for s in stats}
-    return problems, solved_map
-
-def fetch_solved_problems(handle: str):
-    if not handle:
-        return set()
-    r = requests.get(f"{USER_SUBMISSIONS_URL}?handle={handle}", timeout=60)
-    r.raise_for_status()
-    data = r.json()
-    solved = set()
-    if data.get("status") != "OK":
-        return solved
-    for sub in data["result"]:
-        if sub.get("verdict") == "OK":
-            pid = sub.get("problem", {})
-            solved.add((pid.get("contestId"), pid.get("index")))
-    return solved
-
-def detect_division_from_contest_name(name: str):
-    if not name: return "unknown"
-    m = _div_re.search(name)
-    if m: return f"div{m.group(1)}"
-    m2 = re.search(r"division\s*([1-4])", name, flags=re.I)
-    if m2: return f"div{m2.group(1)}"
-    return "unknown"
-
-def filter_and_prepare(problems, solved_map, contest_map, solved_set, min_rating, max_rating, wanted_indices):
-    wanted_indices = [x.upper() for x in (wanted_indices or [])]
-    rows = []
-    for p in problems:
-        r = p.get("rating")
-        if r is None or r < min_rating or r > max_rating:
-            continue
-        idx = p.get("index", "")
-        if wanted_indices and idx.upper() not in wanted_indices:
-            continue
-        cid = p.get("contestId")
-        contest_name = contest_map.get(cid, "")
-        division = detect_division_from_contest_name(contest_name)
-        is_solved = (cid, idx) in solved_set if solved_set else False
-        rows.append({
-            "contestId": cid,
-            "contestName": contest_name,
-            "index": idx,
-            "name": p.get("name", ""),
-            "rating": r,
-            "tags": p.get("tags", []),
-            "solvedCount": solved_map.get((cid, idx), 0),
-            "link": f"https://codeforces.com/contest/{cid}/problem/{idx}",
-            "division": division,
-            "solved": is_solved   # 👈 added field
-        })
-    return rows
-
-
-def sort_rows(rows, key):
-    if key == "solved": return sorted(rows, key=lambda x: (-x["solvedCount"], x["rating"], x["contestId"], x["index"]))
-    if key == "rating": return sorted(rows, key=lambda x: (x["rating"], x["contestId"], x["index"]))
-    if key == "newest": return sorted(rows, key=lambda x: (-x["contestId"], x["index"]))
-    if key == "oldest": return sorted(rows, key=lambda x: (x["contestId"], x["index"]))
-    return rows
+    result = codeforces.download_problemset()
+    snapshot.store(SNAPSHOT_PATH, "problemset", result)
+    return codeforces.problemset_from(result)
+
+contests_cache = TTLCache(fetch_contests, CACHE_TTL)
+problemset_cache = TTLCache(fetch_problemset, CACHE_TTL)
+
+def seed_caches_from_snapshot():
+    """Serve the on-disk copy until the first refresh lands (and keep serving it if Codeforces is down)."""
+    sections = snapshot.load(SNAPSHOT_PATH)
+    for name, cache, parse in (("contests", contests_cache, codeforces.contest_map_from),
+                               ("problemset", problemset_cache, codeforces.problemset_from)):
+        if name in sections:
+            section = sections[name]
+            cache.seed(parse(section["data"]), age=time.time() - section["saved_at"])
+
+shared = MappedSnapshot(SHARED_SNAPSHOT_PATH) if SHARED_SNAPSHOT_PATH else None
+# the refresh itself runs inside an upstream.parallel() task; its fetches must not queue behind that pool
+_refresh_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="cf-refresh")
+
+def refresh_shared_snapshot():
+    """Fetch and publish a new shared generation, unless another worker did so while we waited for the lock."""
+    with shared.writer_lock():
+        age = shared.age()
+        if age is not None and age < CACHE_TTL / 2:
+            return
+        contests = _refresh_pool.submit(fetch_contests)
+        problems, solved_map = _refresh_pool.submit(fetch_problemset).result()
+        contest_map = contests.result()
+        # reuse the sort permutations the refresh did not invalidate
+        index, _ = ProblemIndex.refreshed(shared.index(), problems, solved_map, contest_map)
+        shared.publish(index)
+
+def seed_shared_from_snapshot():
+    """Publish the on-disk copy if no worker has published a shared index yet, so a cold start needs no Codeforces."""
+    with shared.writer_lock():
+        try:
+            if os.path.getsize(shared.path) > 0:
+                return
+            os.remove(shared.path)   # an empty file left behind holds no index
+        except FileNotFoundError:
+            pass
+        sections = snapshot.load(SNAPSHOT_PATH)
+        if "contests" not in sections or "problemset" not in sections:
+            return
+        problems, solved_map = codeforces.problemset_from(sections["problemset"]["data"])
+        contest_map = codeforces.contest_map_from(sections["contests"]["data"])
+        shared.publish(ProblemIndex.from_problems(problems, solved_map, contest_map))
+        # dated like the data it holds, so the first request still starts a refresh
+        saved_at = min(sections["contests"]["saved_at"], sections["problemset"]["saved_at"])
+        os.utime(shared.path, (saved_at, saved_at))
+
+if shared is not None:
+    # workers map the shared file instead of keeping their own parsed copy
+    seed_shared_from_snapshot()
+    shared_refresh = TTLCache(refresh_shared_snapshot, CACHE_TTL)
+    if shared.age() is not None:
+        shared_refresh.seed(None, age=shared.age())
+    INDEX_SOURCES = (lambda: metrics.timed("shared_snapshot", shared_refresh.get),)
+    INDEX_CACHES = (shared_refresh,)
+    metrics.register_cache("shared_snapshot", shared_refresh)
+else:
+    seed_caches_from_snapshot()
+    INDEX_SOURCES = (lambda: metrics.timed("contests", contests_cache.get),
+                     lambda: metrics.timed("problemset", problemset_cache.get))
+    INDEX_CACHES = (contests_cache, problemset_cache)
+    metrics.register_cache("contests", contests_cache)
+    metrics.register_cache("problemset", problemset_cache)
+
+# handle -> solved set, kept up to date with small incremental user.status calls
+SOLVED_FRESH_FOR = float(os.environ.get("CF_SOLVED_FRESH", 5))   # seconds a sync is reused without asking again
+solved_sets = SolvedSets(codeforces.download_submissions, maxsize=int(os.environ.get("CF_SOLVED_CACHE_SIZE", 1024)),
+                         fresh_for=SOLVED_FRESH_FOR)
+
+def fetch_solved_state(handle: str):
+    """(solved set, version) for ETags; the version changes whenever the set does."""
+    with metrics.stage("solved"):
+        return solved_sets.get_versioned(handle)
+
+metrics.register_cache("solved_sets", solved_sets)
+
+# handle -> current rating for sort=recommended; ratings only move after rated contests
+ratings = Ratings(maxsize=int(os.environ.get("CF_SOLVED_CACHE_SIZE", 1024)),
+                  ttl=float(os.environ.get("CF_RATING_TTL", 3600)))
+metrics.register_cache("ratings", ratings)
+
+def fetch_rating(handle: str):
+    with metrics.stage("rating"):
+        found, rating = ratings.cached(handle)
+        return rating if found else ratings.put(handle, codeforces.download_rating(handle))
+
+# encoded ladder bodies for repeated queries, keyed by ETag and content encoding
+ladder_bodies = responses.BodyCache(int(os.environ.get("CF_RESPONSE_CACHE_BYTES", 32 << 20)))
+metrics.register_cache("ladder_bodies", ladder_bodies)
+
+# pre-sorted row ids per handle-independent query; the handle's solved set is overlaid per request
+ladder_cache = ResultCache(int(os.environ.get("CF_LADDER_CACHE_BYTES", 64 << 20)), weigh=lambda ids: ids.nbytes + 100)
+metrics.register_cache("ladders", ladder_cache)
+
+ROW_FIELDS = ("contestId", "contestName", "index", "name", "rating", "tags",
+              "solvedCount", "link", "division", "solved")
+
+# per (index generation, field projection): each row's JSON encoded once, solved flag spliced in per request
+row_fragments = LRUCache(int(os.environ.get("CF_FRAGMENT_SETS", 8)))
+metrics.register_cache("row_fragments", row_fragments)
+
+_index_lock = threading.Lock()
+_index = None
+_index_key = None
+
+def current_index() -> ProblemIndex:
+    """Columnar index over the cached snapshot, rebuilt only when contests or problems were refreshed."""
+    global _index, _index_key
+    if shared is not None:
+        shared_refresh.get()
+        index = shared.index()
+        if index is not _index:
+            with _index_lock:
+                if index is not _index:
+                    advance(_index, index, diff(_index, index) if _index is not None else None)
+                    _index = index
+        return index
+    # keyed on the generations of the values actually used, so a refresh landing meanwhile forces a rebuild
+    contest_map, contests_generation = contests_cache.get_versioned()
+    (problems, solved_map), problemset_generation = problemset_cache.get_versioned()
+    key = (contests_generation, problemset_generation)
+    with _index_lock:
+        if _index is None or _index_key != key:
+            index, delta = metrics.timed("refresh_index", ProblemIndex.refreshed, _index, problems, solved_map,
+                                         contest_map)
+            # from the content, not the cache counters, so every worker tags the same data with the same ETags
+            index.generation = index.digest()
+            advance(_index, index, delta)
+            _index, _index_key = index, key
+        return _index
+
+def advance(old: ProblemIndex, new: ProblemIndex, delta: IndexDelta):
+    """Switch the materialised ladders to ``new``, keeping those the delta cannot have changed."""
+    if delta is None:
+        ladder_cache.advance(new.generation)
+        return
+    for kind, n in delta.summary().items():
+        metrics.SNAPSHOT_CHANGES.inc(kind, amount=n)
+
+    def carry(key, ids):
+        moved = delta.row_map[ids]
+        if (moved < 0).any() or delta.touched[moved].any():
+            return None    # a listed problem was removed or changed
+        min_rating, max_rating, indices, divisions, sort_key, any_tags, all_tags, exclude_tags = key
+        mask = codeforces.query_mask(new, min_rating, max_rating, indices, divisions, any_tags, all_tags, exclude_tags)
+        if (mask & delta.touched).any():
+            return None    # a problem now matches that did not before (or changed)
+        if sort_key == "solved" and (mask & delta.solved_changed).any():
+            return None    # solve counts moved, so the order may have
+        return moved
+    with metrics.stage("carry_ladders"):
+        ladder_cache.advance(new.generation, carry)
+
+def _norm(values, case=str.lower):
+    return tuple(sorted({case(v) for v in values}))
+
+def ladder_key(min_rating, max_rating, wanted_indices, sort_key, divisions=(),
+               any_tags=(), all_tags=(), exclude_tags=()):
+    """Normalised, handle-independent form of a ladder query."""
+    return (min_rating, max_rating, _norm(wanted_indices, str.upper), _norm(divisions), sort_key,
+            _norm(any_tags), _norm(all_tags), _norm(exclude_tags))
+
+def select_problems(index: ProblemIndex, min_rating, max_rating, wanted_indices, sort_key="solved", divisions=(),
+                    any_tags=(), all_tags=(), exclude_tags=()):
+    """Row ids of matching problems in ``sort_key`` order, materialised per snapshot and query."""
+    def compute():
+        with metrics.stage("filter"):
+            mask = codeforces.query_mask(index, min_rating, max_rating, wanted_indices, divisions,
+                                     any_tags, all_tags, exclude_tags)
+        with metrics.stage("sort"):
+            return index.ordered(mask, sort_key)
+    key = ladder_key(min_rating, max_rating, wanted_indices, sort_key, divisions, any_tags, all_tags, exclude_tags)
+    return ladder_cache.get_or_compute(index.generation, key, compute)
+
+def fragments_for(index: ProblemIndex, fields=None) -> RowFragments:
+    fields = tuple(sorted(fields)) if fields else ROW_FIELDS
+    return row_fragments.setdefault((index.generation, fields), lambda: RowFragments(index, fields))
+
+STREAM_TYPES = {"": None, "json": "application/json", "ndjson": "application/x-ndjson"}
+
+class BadQuery(ValueError):
+    """Malformed query parameter; answered with a 400."""
+
+def _list_arg(args, name: str):
+    return [x.strip() for x in args.get(name, "").split(",") if x.strip()]
+
+def _int_arg(args, name: str, default: int) -> int:
+    value = args.get(name, "").strip()
+    if not value:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise BadQuery(f"{name} must be an integer, got {value!r}") from None
+
+def parse_ladder_query(args):
+    """(query, view) from the filter and paging / projection / streaming parameters of the ladder endpoints."""
+    # tags=dp,greedy (any of), all_tags=math,strings, exclude_tags=*special; indices=A,B; divisions=div2,div3
+    query = (_int_arg(args, "min", 800), _int_arg(args, "max", 3500),
+             _list_arg(args, "indices"), args.get("sort", "solved"), _list_arg(args, "divisions"),
+             _list_arg(args, "tags"), _list_arg(args, "all_tags"), _list_arg(args, "exclude_tags"))
+    # optional paging / projection: offset=50&limit=25&fields=name,link (default: everything)
+    offset = max(_int_arg(args, "offset", 0), 0)
+    limit = max(_int_arg(args, "limit", 0), 0)
+    if query[3] == RECOMMENDED and not limit:
+        limit = DEFAULT_LIMIT   # a recommendation is a short list, never the whole problemset
+    fields = _list_arg(args, "fields")
+    # stream=json|ndjson: send rows as they are encoded, uncompressed and not cached
+    stream = args.get("stream", "").strip().lower()
+    if stream not in STREAM_TYPES:
+        raise BadQuery(f"Unknown stream mode: {stream}")
+    unknown = [f for f in fields if f not in ROW_FIELDS]
+    if unknown:
+        raise BadQuery(f"Unknown fields: {', '.join(unknown)}")
+    return query, (offset, limit, fields, stream)
+
+def recommender(index: ProblemIndex, view, solved_set, rating):
+    """narrow() for sort=recommended: the handle's best offset + limit picks among the matching problems."""
+    offset, limit, _, _ = view
+
+    def narrow(ids):
+        with metrics.stage("recommend"):
+            return recommend.recommend(index, ids, solved_set, rating, offset + limit)
+    return narrow
+
+def render_ladder(index: ProblemIndex, query, view, solved_set, etag_parts, accept_encodings, if_none_match,
+                  narrow=None):
+    """
+    (status, body, mimetype, headers) of the ladder response for ``query``,
+    independent of the web framework: ``body`` is bytes, or an iterator of
+    chunks when streaming. ``etag_parts`` identify everything else the body
+    depends on, and ``narrow(ids)`` optionally filters the materialised ids.
+    """
+    offset, limit, fields, stream = view
+
+    def page():
+        ids = select_problems(index, *query)
+        if narrow is not None:
+            ids = narrow(ids)
+        return ids, (ids[offset:offset + limit] if limit else ids[offset:])
+
+    # each content encoding is its own representation, so it is part of the (strong) ETag
+    encoding = "identity" if stream else responses.choose_encoding(accept_encodings)
+    etag = responses.make_etag(index.generation, *etag_parts, ladder_key(*query),
+                               offset, limit, sorted(fields), encoding, stream)
+    headers = {"ETag": f'"{etag}"',
+               "Cache-Control": "no-cache",   # always revalidate, which is cheap with the ETag
+               "Vary": "Accept-Encoding"}
+    if etag in if_none_match:
+        return 304, b"", None, headers
+    if stream:
+        ids, rows = page()
+        body = fragments_for(index, fields).stream(rows, solved_set, ndjson=stream == "ndjson")
+        headers["X-Total-Count"] = str(len(ids))
+        return 200, body, STREAM_TYPES[stream], headers
+    cached = ladder_bodies.get(etag, encoding)
+    if cached is None:
+        ids, rows = page()
+        with metrics.stage("serialize"):
+            body = fragments_for(index, fields).encode(rows, solved_set)
+        with metrics.stage("compress"):
+            cached = ladder_bodies.encode_and_put(etag, encoding, body, {"X-Total-Count": str(len(ids))},
+                                                  personal=bool(solved_set))
+    body, used, extra = cached
+    headers.update(extra)
+    if used != "identity":
+        headers["Content-Encoding"] = used
+    return 200, body, "application/json", headers
+
+def serve_ladder(index: ProblemIndex, query, view, solved_set, etag_parts, narrow=None) -> Response:
+    status, body, mimetype, headers = render_ladder(index, query, view, solved_set, etag_parts,
+                                                    request.accept_encodings, request.if_none_match, narrow)
+    return Response(body, status=status, mimetype=mimetype, headers=headers)
+
+def finish(resp: Response, endpoint: str, timings) -> Response:
+    if resp.is_streamed:
+        resp.response = metrics.counted_body(endpoint, resp.response)   # size known once it has been sent
+    else:
+        metrics.RESPONSE_BYTES.observe(endpoint, resp.content_length or 0)
+    resp.headers["Server-Timing"] = timings.server_timing()
+    return resp
+
+def rejection(e: BadQuery) -> Response:
+    resp = jsonify({"error": str(e)})
+    resp.status_code = 400
+    return resp
+
+def failure(e: Exception, timings) -> Response:
+    # name the stage that failed so a 500 can be told apart from the others
+    resp = jsonify({"error": str(e), "stage": timings.failed})
+    resp.status_code = 500
+    return resp
 
 @app.route("/api/ladder")
 def ladder():
+    timings = metrics.collect()
     try:
         handle = request.args.get("handle", "").strip()
-        min_rating = int(request.args.get("min", 800))
-        max_rating = int(request.args.get("max", 3500))
-        sort_key = request.args.get("sort", "solved")
-        indices_param = request.args.get("indices", "").strip()  # e.g. "A,B"
-        wanted_indices = [x.strip() for x in indices_param.split(",") if x.strip()] if indices_param else []
-
-        contest_map = fetch_contests()
-        problems, solved_map = fetch_problemset()
-        solved_set = fetch_solved_problems(handle)
-        rows = filter_and_prepare(problems, solved_map, contest_map, solved_set, min_rating, max_rating, wanted_indices)
-        rows = sort_rows(rows, sort_key)
-        return jsonify(rows)
+        query, view = parse_ladder_query(request.args)
+        recommending = query[3] == RECOMMENDED
+        if recommending and not handle:
+            raise BadQuery(f"sort={RECOMMENDED} needs a handle")
+        # the upstream datasets are independent; wait for the slowest, not the sum
+        rating_source = (lambda: fetch_rating(handle),) if recommending else ()
+        states = upstream.parallel(*INDEX_SOURCES, lambda: fetch_solved_state(handle), *rating_source)
+        solved_set, solved_version = states[len(INDEX_SOURCES)]
+        index = metrics.timed("index", current_index)
+        etag_parts, narrow = (handle.lower(), solved_version), None
+        if recommending:
+            etag_parts += (states[-1],)
+            narrow = recommender(index, view, solved_set, states[-1])
+        resp = serve_ladder(index, query, view, solved_set, etag_parts, narrow)
+    except BadQuery as e:
+        resp = rejection(e)
+    except Exception as e:
+        resp = failure(e, timings)
+    return finish(resp, "ladder", timings)
+
+# upper bound on handles per team request; each new handle costs rate-limited user.status calls
+TEAM_MAX_HANDLES = int(os.environ.get("CF_TEAM_MAX_HANDLES", 50))
+# team lookups can each wait seconds for a rate-limit token, so they get a few threads of their own
+# instead of filling upstream's pool, which every other request needs for its own fetches
+TEAM_FETCHES = int(os.environ.get("CF_TEAM_FETCHES", 4))
+_team_pool = ThreadPoolExecutor(max_workers=TEAM_FETCHES, thread_name_prefix="cf-team")
+
+class TeamFetch:
+    """The solved states of a team's handles, fetched TEAM_FETCHES at a time; the first failure drops the rest."""
+
+    def __init__(self, handles):
+        self._abandon = threading.Event()
+        self._futures = [_team_pool.submit(contextvars.copy_context().run, self._fetch, h) for h in handles]
+
+    def _fetch(self, handle: str):
+        upstream.abandon.set(self._abandon)   # in this task's context copy only
+        return fetch_solved_state(handle)
+
+    def result(self):
+        wait(self._futures, return_when=FIRST_EXCEPTION)
+        for f in self._futures:
+            if f.done() and f.exception() is not None:
+                self.abandon()
+                raise f.exception()
+        return [f.result() for f in self._futures]
+
+    def abandon(self):
+        """Stop every lookup: queued ones never start, running ones give up their pending upstream calls."""
+        self._abandon.set()
+        for f in self._futures:
+            f.cancel()
+
+@app.route("/api/team_ladder")
+def team_ladder():
+    """
+    One ladder for a group of handles: handles=a,b,c&solved_by=unsolved|any|all|atleast
+    (&k=2 for atleast), plus every /api/ladder parameter. A row's "solved" is
+    true when anyone in the group solved it.
+    """
+    timings = metrics.collect()
+    try:
+        handles = list(dict.fromkeys(h.lower() for h in _list_arg(request.args, "handles")))
+        if not handles or len(handles) > TEAM_MAX_HANDLES:
+            raise BadQuery(f"handles must list 1 to {TEAM_MAX_HANDLES} handles")
+        mode = request.args.get("solved_by", "unsolved")
+        if mode not in GROUP_MODES:
+            raise BadQuery(f"solved_by must be one of {', '.join(GROUP_MODES)}")
+        k = _int_arg(request.args, "k", 1)
+        if not 1 <= k <= len(handles):
+            raise BadQuery(f"k must be between 1 and the number of handles ({len(handles)})")
+        query, view = parse_ladder_query(request.args)
+        if query[3] == RECOMMENDED:
+            raise BadQuery(f"sort={RECOMMENDED} is for one handle; use /api/ladder")
+
+        # solved sets are fetched concurrently; the scheduler keeps them within the rate limit
+        team = TeamFetch(handles)
+        try:
+            upstream.parallel(*INDEX_SOURCES)
+            states = team.result()
+        except BaseException:
+            team.abandon()
+            raise
+        solved_sets = [solved for solved, _ in states]
+        versions = tuple(sorted(zip(handles, (version for _, version in states))))
+        index = metrics.timed("index", current_index)
+
+        def narrow(ids):
+            with metrics.stage("group"):
+                return ids[index.group_mask(solved_sets, mode, k)[ids]]
+
+        anyone = set().union(*solved_sets) if mode != "unsolved" else set()
+        resp = serve_ladder(index, query, view, anyone, ("team", mode, k, versions), narrow)
+    except BadQuery as e:
+        resp = rejection(e)
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        resp = failure(e, timings)
+    return finish(resp, "team_ladder", timings)
+
+@app.route("/metrics")
+def prometheus_metrics():
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+@app.route("/api/upstream")
+def upstream_stats():
+    """Upstream call queue depth and wait times for this worker."""
+    return jsonify(scheduler.stats())
 
 @app.route("/")
 def health():
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# backend/asgi.py
+"""
+asyncio serving mode.
+
+/api/ladder is answered on the event loop. The handle's solved set is synced
+with non-blocking user.status calls (AsyncSolvedSets over AsyncUpstream), so
+a slow Codeforces answer costs a suspended coroutine, not a whole worker.
+Filtering, sorting and serialisation are the Flask view's code
+(app.render_ladder); only a cold snapshot load goes to a thread. Each
+request has a deadline (CF_REQUEST_DEADLINE seconds, then 504) and is
+cancelled, upstream calls included, when the client disconnects. Every
+other path is served by the Flask app.
+
+  uvicorn asgi:application --workers 4 --port 5000
+"""
+
+import asyncio
+import json
+import os
+from urllib.parse import parse_qsl
+
+from uvicorn.middleware.wsgi import WSGIMiddleware
+from werkzeug.datastructures import MultiDict
+from werkzeug.http import parse_accept_header, parse_etags
+
+import app
+import codeforces
+import metrics
+import upstream
+from recommend import RECOMMENDED
+from submissions import AsyncSolvedSets
+
+DEADLINE = float(os.environ.get("CF_REQUEST_DEADLINE", 25))
+
+# what flask_cors adds to the Flask responses
+CORS_HEADERS = {"Access-Control-Allow-Origin": "*",
+                "Access-Control-Expose-Headers": "ETag, Server-Timing, X-Total-Count"}
+
+solved_sets = AsyncSolvedSets(codeforces.download_submissions_async,
+                              maxsize=int(os.environ.get("CF_SOLVED_CACHE_SIZE", 1024)),
+                              fresh_for=app.SOLVED_FRESH_FOR)
+metrics.register_cache("solved_sets_async", solved_sets)
+
+flask_app = WSGIMiddleware(app.app)
+
+async def fetch_solved_state(handle: str):
+    with metrics.stage("solved"):
+        return await solved_sets.get_versioned(handle)
+
+async def fetch_rating(handle: str):
+    with metrics.stage("rating"):
+        found, rating = app.ratings.cached(handle)
+        return rating if found else app.ratings.put(handle, await codeforces.download_rating_async(handle))
+
+async def ladder(args, headers: dict):
+    """(status, body, mimetype, headers) for /api/ladder, as app.ladder() would answer."""
+    handle = args.get("handle", "").strip()
+    query, view = app.parse_ladder_query(args)
+    recommending = query[3] == RECOMMENDED
+    if recommending and not handle:
+        raise app.BadQuery(f"sort={RECOMMENDED} needs a handle")
+    calls = [fetch_solved_state(handle)] + ([fetch_rating(handle)] if recommending else [])
+    if not all(cache.loaded for cache in app.INDEX_CACHES):
+        # cold start: load the snapshot on a thread while the handle's data is fetched
+        calls.append(asyncio.to_thread(lambda: [source() for source in app.INDEX_SOURCES]))
+    states = await asyncio.gather(*calls)
+    solved_set, solved_version = states[0]
+    # the rest is CPU-bound and holds the GIL either way, so it runs on the loop instead of paying for
+    # thread hand-offs; the snapshot caches refresh in the background and never block here once loaded
+    index = metrics.timed("index", app.current_index)
+    etag_parts, narrow = (handle.lower(), solved_version), None
+    if recommending:
+        etag_parts += (states[1],)
+        narrow = app.recommender(index, view, solved_set, states[1])
+    return app.render_ladder(index, query, view, solved_set, etag_parts,
+                             parse_accept_header(headers.get("accept-encoding")),
+                             parse_etags(headers.get("if-none-match")), narrow)
+
+def error(status: int, payload: dict):
+    """An error answer shaped like the Flask app's jsonify() one."""
+    body = json.dumps(payload, separators=(",", ":"), sort_keys=True).encode("utf-8") + b"\n"
+    return status, body, "application/json", {}
+
+async def disconnected(receive):
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+async def serve_ladder(scope, receive, send):
+    timings = metrics.collect()
+    args = MultiDict(parse_qsl(scope["query_string"].decode("latin-1"), keep_blank_values=True))
+    headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope["headers"]}
+    upstream.deadline.set(asyncio.get_running_loop().time() + DEADLINE)
+    work = asyncio.ensure_future(asyncio.wait_for(ladder(args, headers), DEADLINE))
+    gone = asyncio.ensure_future(disconnected(receive))
+    await asyncio.wait((work, gone), return_when=asyncio.FIRST_COMPLETED)
+    if not work.done():
+        # nobody is left to answer; cancelling also drops upstream calls no other request waits for
+        work.cancel()
+        metrics.REQUESTS_ABORTED.inc("ladder", "disconnect")
+        return
+    gone.cancel()
+    try:
+        status, body, mimetype, extra = work.result()
+    except app.BadQuery as e:
+        status, body, mimetype, extra = error(400, {"error": str(e)})
+    except asyncio.TimeoutError:
+        metrics.REQUESTS_ABORTED.inc("ladder", "deadline")
+        status, body, mimetype, extra = error(504, {"error": f"No answer within {DEADLINE:g}s",
+                                                    "stage": timings.failed})
+    except upstream.Overloaded as e:
+        metrics.REQUESTS_ABORTED.inc("ladder", "overloaded")
+        status, body, mimetype, extra = error(503, {"error": str(e), "stage": timings.failed})
+    except Exception as e:
+        status, body, mimetype, extra = error(500, {"error": str(e), "stage": timings.failed})
+
+    extra = dict(extra, **CORS_HEADERS)
+    if mimetype:
+        extra["Content-Type"] = mimetype
+    if isinstance(body, bytes):
+        extra["Content-Length"] = str(len(body))
+    extra["Server-Timing"] = timings.server_timing()
+    await send({"type": "http.response.start", "status": status,
+                "headers": [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in extra.items()]})
+    if isinstance(body, bytes):
+        metrics.RESPONSE_BYTES.observe("ladder", len(body))
+        await send({"type": "http.response.body", "body": body})
+        return
+    sent = 0
+    try:
+        for chunk in body:
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            sent += len(chunk)
+        await send({"type": "http.response.body", "body": b""})
+    finally:
+        metrics.RESPONSE_BYTES.observe("ladder", sent)   # a stream's size is only known once it has been sent
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await upstream.async_upstream.aclose()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+async def application(scope, receive, send):
+    if scope["type"] == "lifespan":
+        await lifespan(receive, send)
+    elif scope["type"] == "http" and scope["path"] == "/api/ladder" and scope["method"] == "GET":
+        await serve_ladder(scope, receive, send)
+    else:
+        await flask_app(scope, receive, send)
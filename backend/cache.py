@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# backend/cache.py
+"""
+In-process caches for upstream Codeforces data.
+
+TTLCache keeps the last good value of an expensive loader, serves it while a
+background refresh is running (stale-while-revalidate) and makes sure that
+concurrent cold callers share a single upstream load (single-flight).
+LRUCache is a bounded, thread-safe mapping for per-key state such as
+per-handle solved sets. ResultCache holds results computed from one data
+generation, bounded by their total size; when the owner advances it to a new
+generation, entries are carried over (possibly rewritten) or dropped.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+log = logging.getLogger(__name__)
+
+
+class _Flight:
+    """One running load; waiters block on ``done`` and then read ``error``."""
+    __slots__ = ("done", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.error = None
+
+
+class TTLCache:
+    def __init__(self, loader, ttl: float, retry_after: float = 60.0, wait_timeout: float = 120.0):
+        self.loader = loader
+        self.ttl = ttl
+        self.retry_after = min(retry_after, ttl)
+        self.wait_timeout = wait_timeout   # how long a cold caller waits for another caller's load
+        self.generation = 0          # bumped on every successful load
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._value = None
+        self._expires_at = None      # None -> nothing loaded yet
+        self._flight = None
+
+    def get(self):
+        return self.get_versioned()[0]
+
+    def get_versioned(self):
+        """(value, generation), read together: the generation is the one that loaded this value."""
+        with self._lock:
+            flight = self._flight
+            if self._expires_at is not None:
+                self.hits += 1
+                if flight is None and time.monotonic() >= self._expires_at:
+                    self._flight = _Flight()
+                    threading.Thread(target=self._load, args=(self._flight,), daemon=True).start()
+                return self._value, self.generation
+            self.misses += 1
+            leader = flight is None
+            if leader:
+                flight = self._flight = _Flight()
+        if leader:
+            self._load(flight)
+        elif not flight.done.wait(self.wait_timeout):
+            raise TimeoutError(f"{getattr(self.loader, '__name__', self.loader)} still loading "
+                               f"after {self.wait_timeout:g}s")
+        if flight.error is not None:
+            raise flight.error
+        with self._lock:
+            return self._value, self.generation
+
+    @property
+    def loaded(self) -> bool:
+        """True once a value is available; from then on get() never waits for the loader."""
+        return self._expires_at is not None
+
+    def seed(self, value, age: float = 0.0):
+        """Install a value loaded elsewhere (e.g. from disk) that is ``age`` seconds old."""
+        with self._lock:
+            if self._expires_at is not None:
+                return
+            self._value = value
+            self._expires_at = time.monotonic() + self.ttl - max(age, 0.0)
+            self.generation += 1
+
+    def _load(self, flight: _Flight):
+        try:
+            value = self.loader()
+        except Exception as e:
+            flight.error = e
+            with self._lock:
+                self._flight = None
+                if self._expires_at is not None:
+                    log.warning("background refresh of %s failed, serving stale copy: %s",
+                                getattr(self.loader, "__name__", self.loader), e)
+                    self._expires_at = time.monotonic() + self.retry_after
+        else:
+            with self._lock:
+                self._value = value
+                self._expires_at = time.monotonic() + self.ttl
+                self.generation += 1
+                self._flight = None
+        finally:
+            flight.done.set()
+
+
+class LRUCache:
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            self._evict()
+
+    def setdefault(self, key, factory):
+        """Return the value for key, creating it with factory() on a miss."""
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            value = self._data[key] = factory()
+            self._evict()
+            return value
+
+    def _evict(self):
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+
+class ResultCache:
+    def __init__(self, max_weight: int, weigh):
+        self.max_weight = max_weight
+        self.weigh = weigh
+        self.weight = 0
+        self.hits = 0
+        self.misses = 0
+        self.generation = None
+        self._data = OrderedDict()   # key -> (value, weight)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get_or_compute(self, generation, key, compute):
+        """
+        Cached compute() for ``key`` under ``generation``. The first generation
+        seen becomes current; results for any other generation are computed but
+        not stored (see advance()).
+        """
+        with self._lock:
+            if self.generation is None:
+                self.generation = generation
+            entry = self._data.get(key) if generation == self.generation else None
+            if entry is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+        value = compute()
+        w = self.weigh(value)
+        with self._lock:
+            if generation == self.generation and w <= self.max_weight and key not in self._data:
+                self._data[key] = (value, w)
+                self.weight += w
+                while self.weight > self.max_weight:
+                    _, (_, old) = self._data.popitem(last=False)
+                    self.weight -= old
+        return value
+
+    def advance(self, generation, carry=None):
+        """
+        Make ``generation`` current. ``carry(key, value)`` returns the value to
+        keep under the new generation, or None to drop the entry; without it
+        the cache is emptied.
+        """
+        with self._lock:
+            if generation == self.generation:
+                return
+            old, self._data, self.weight = self._data, OrderedDict(), 0
+            self.generation = generation
+            if carry is None:
+                return
+            for key, (value, _) in old.items():
+                value = carry(key, value)
+                if value is not None:
+                    w = self.weigh(value)
+                    self._data[key] = (value, w)
+                    self.weight += w
+            # a carried value may weigh more than the one it replaces; drop the least recently used
+            while self.weight > self.max_weight:
+                _, (_, w) = self._data.popitem(last=False)
+                self.weight -= w
+
+    def clear(self):
+        with self._lock:
+            self._clear()
+
+    def _clear(self):
+        self._data.clear()
+        self.weight = 0
@@ -9,163 +9,93 @@ Usage examples:
   python cf_division_ladder.py --divisions div2 --indices A B C D E F --rating 1200
   python cf_division_ladder.py --divisions div1 div2 div3 div4 --indices A B C --range 800 1400 --combine
   python cf_division_ladder.py --divisions div1 div2 div3 div4 --indices A B C D E F --range 800 3500 --handle TellMeTrue
+  python cf_division_ladder.py --divisions div2 --indices A --range 800 1400 --offline
+  python cf_division_ladder.py --indices A B C D E F --range 800 3500 --handle TellMeTrue --sort recommended --combine
+  python cf_division_ladder.py --batch ladder_matrix.json --outdir ../ladders
 """
 
 import argparse
 import csv
+import hashlib
 import html
+import json
 import os
-import re
 import sys
-from typing import Dict, List, Tuple, Optional
-import requests
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Tuple, Optional
 
-PROBLEMS_URL = "https://codeforces.com/api/problemset.problems"
-CONTESTS_URL = "https://codeforces.com/api/contest.list"
-USER_SUBMISSIONS_URL = "https://codeforces.com/api/user.status"
+import numpy as np
+
+import metrics
+import snapshot
+import upstream
+from codeforces import (contest_map_from, download_contests, download_problemset, download_rating,
+                    download_submissions, problemset_from, select_ids, solved_from)
+from problem_index import DIVISIONS, GROUP_MODES, SORT_KEYS, ContestMap, Problem, ProblemIndex
+from recommend import DEFAULT_LIMIT, RECOMMENDED, recommend
 
 # ---------------------- Fetch data ----------------------
 
-def fetch_contests() -> Dict[int, str]:
-    r = requests.get(CONTESTS_URL, params={"gym": False}, timeout=60)
-    r.raise_for_status()
-    data = r.json()
-    if data.get("status") != "OK":
-        raise RuntimeError("Failed to fetch contests from Codeforces API")
-    return {c["id"]: c.get("name", "") for c in data["result"]}
-
-def fetch_problemset() -> Tuple[List[dict], Dict[Tuple[int, str], int]]:
-    r = requests.get(PROBLEMS_URL, timeout=60)
-    r.raise_for_status()
-    data = r.json()
-    if data.get("status") != "OK":
-        raise RuntimeError("Failed to fetch problems from Codeforces API")
-    problems = data["result"]["problems"]
-    stats = data["result"].get("problemStatistics", [])
-    solved_map = {}
-    for s in stats:
-        solved_map[(s["contestId"], s["index"])] = s.get("solvedCount", 0)
-    return problems, solved_map
+def fetch_contests(snapshot_path: str = snapshot.DEFAULT_PATH, offline: bool = False) -> ContestMap:
+    """Contest id -> name (divisions classified once), from Codeforces or (offline / on upstream error) the snapshot."""
+    return contest_map_from(snapshot.fetch_through(snapshot_path, "contests", download_contests, offline))
+
+def fetch_problemset(snapshot_path: str = snapshot.DEFAULT_PATH,
+                     offline: bool = False) -> Tuple[List[dict], Dict[Tuple[int, str], int]]:
+    return problemset_from(snapshot.fetch_through(snapshot_path, "problemset", download_problemset, offline))
 
 def fetch_solved_problems(handle: str) -> set:
     """Return set of (contestId, index) for problems the user has solved."""
-    url = f"{USER_SUBMISSIONS_URL}?handle={handle}"
-    r = requests.get(url, timeout=60)
-    r.raise_for_status()
-    data = r.json()
-    if data.get("status") != "OK":
-        raise RuntimeError(f"Failed to fetch submissions for handle {handle}")
-    solved = set()
-    for sub in data["result"]:
-        if sub.get("verdict") == "OK":
-            pid = sub.get("problem", {})
-            solved.add((pid.get("contestId"), pid.get("index")))
-    return solved
+    return solved_from(download_submissions(handle))
 
 # ---------------------- Filtering ----------------------
 
-def detect_division_from_contest_name(name: str) -> Optional[str]:
-    if not name:
-        return None
-    m = re.search(r"div(?:\.|\s)?\s*([1-4])", name, flags=re.I)
-    if m:
-        return f"div{m.group(1)}"
-    m2 = re.search(r"division\s*([1-4])", name, flags=re.I)
-    if m2:
-        return f"div{m2.group(1)}"
-    return None
-
-def matches_index(idx: str, wanted_prefixes: List[str]) -> bool:
-    idx = (idx or "").upper()
-    for pref in wanted_prefixes:
-        if idx.startswith(pref.upper()):
-            return True
-    return False
-
-def filter_and_annotate(
-    problems: List[dict],
-    solved_map: Dict[Tuple[int, str], int],
-    contest_map: Dict[int, str],
-    wanted_divisions: List[str],
-    wanted_indices: List[str],
-    exact_rating: Optional[int],
-    min_rating: Optional[int],
-    max_rating: Optional[int],
-    solved_set: Optional[set] = None,
-) -> List[dict]:
-    wanted_divisions = [d.lower() for d in (wanted_divisions or [])]
-    wanted_indices = [i.upper() for i in (wanted_indices or [])]
-    rows = []
-    for p in problems:
-        if "rating" not in p:
-            continue
-        idx = p.get("index", "")
-        if not matches_index(idx, wanted_indices):
-            continue
-        r = p["rating"]
-        if exact_rating is not None:
-            if r != exact_rating:
-                continue
-        else:
-            if min_rating is not None and r < min_rating:
-                continue
-            if max_rating is not None and r > max_rating:
-                continue
-        cid = p.get("contestId")
-        if solved_set and (cid, idx) in solved_set:
-            continue  # skip solved problems
-        contest_name = contest_map.get(cid, "")
-        division = detect_division_from_contest_name(contest_name)
-        if wanted_divisions and (division is None or division.lower() not in wanted_divisions):
-            continue
-        sc = solved_map.get((cid, idx), 0)
-        link = f"https://codeforces.com/contest/{cid}/problem/{idx}"
-        rows.append({
-            "contestId": cid,
-            "contestName": contest_name,
-            "index": idx,
-            "name": p.get("name", ""),
-            "rating": r,
-            "tags": p.get("tags", []),
-            "solvedCount": sc,
-            "link": link,
-            "division": division or "unknown",
-        })
-    return rows
+def filter_and_annotate(index: ProblemIndex, *args, **kwargs) -> List[dict]:
+    """Like select_ids(), materialised as row dicts."""
+    return [index.row(i) for i in select_ids(index, *args, **kwargs)]
+
+def iter_rows(index: ProblemIndex, ids: Iterable[int]) -> Iterator[Problem]:
+    """Problem records for ``ids``, built one at a time as the writer asks for them."""
+    for i in ids:
+        yield index.problem(i)
+
+def group_ids(index: ProblemIndex, ids: np.ndarray) -> List[Tuple[Tuple[str, str], np.ndarray]]:
+    """Split ``ids`` by (division, index), keeping sort order within groups and first-seen order of groups."""
+    keys = index.division[ids].astype(np.int64) * len(index.index_vocab) + index.index_code[ids]
+    uniq, first = np.unique(keys, return_index=True)
+    groups = []
+    for k in uniq[np.argsort(first)]:
+        div, code = divmod(int(k), len(index.index_vocab))
+        groups.append(((DIVISIONS[div], index.index_vocab[code]), ids[keys == k]))
+    return groups
 
 # ---------------------- Sorting & Output ----------------------
 
-def sort_rows(rows: List[dict], sort_key: str) -> List[dict]:
-    if sort_key == "solved":
-        return sorted(rows, key=lambda x: (-x["solvedCount"], x["rating"], x["contestId"], x["index"]))
-    if sort_key == "rating":
-        return sorted(rows, key=lambda x: (x["rating"], x["contestId"], x["index"]))
-    if sort_key == "newest":
-        return sorted(rows, key=lambda x: (-x["contestId"], x["index"]))
-    if sort_key == "oldest":
-        return sorted(rows, key=lambda x: (x["contestId"], x["index"]))
-    return rows
-
-def write_csv(path: str, rows: List[dict]):
+# output files are written through a large buffer as rows are produced; nothing is held per document
+WRITE_BUFFER = 1 << 16
+
+def write_csv(path: str, rows: Iterable[Problem]) -> int:
     os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
-    with open(path, "w", newline="", encoding="utf-8") as f:
+    n = 0
+    with open(path, "w", newline="", encoding="utf-8", buffering=WRITE_BUFFER) as f:
         w = csv.writer(f)
         w.writerow(["#", "contestId", "contestName", "index", "name", "rating", "solvedCount", "tags", "link", "division"])
-        for i, r in enumerate(rows, 1):
+        for n, r in enumerate(rows, 1):
             w.writerow([
-                i, r["contestId"], r["contestName"], r["index"], r["name"], r["rating"],
-                r["solvedCount"], ";".join(r["tags"]), r["link"], r["division"]
+                n, r.contest_id, r.contest_name, r.index, r.name, r.rating,
+                r.solved_count, ";".join(r.tags), r.link, r.division
             ])
+    return n
 
-def write_html(path: str, rows: List[dict], title: str):
-    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
-    def esc(s: str) -> str:
-        return html.escape(str(s), quote=True)
-    head = f"""<!doctype html>
+def _esc(s) -> str:
+    return html.escape(str(s), quote=True)
+
+def html_head(title: str) -> str:
+    return f"""<!doctype html>
 <html>
 <head>
 <meta charset="utf-8">
-<title>{esc(title)}</title>
+<title>{_esc(title)}</title>
 <meta name="viewport" content="width=device-width,initial-scale=1">
 <style>
 body{{font-family:system-ui,Segoe UI,Roboto,Arial,sans-serif;margin:20px}}
@@ -177,27 +107,142 @@ tr:nth-child(even){{background:#fafafa}}
 </style>
 </head>
 <body>
-<h1>{esc(title)}</h1>
+<h1>{_esc(title)}</h1>
 <table>
 <thead><tr><th>#</th><th>Problem</th><th>Contest</th><th>Rating</th><th>Solved</th><th>Tags</th><th>Division</th></tr></thead>
 <tbody>
 """
-    rows_html = []
+
+HTML_FOOT = "</tbody></table></body></html>"
+
+def html_row(i: int, r: Problem) -> str:
+    tags_html = " ".join(f"<span class='tag'>{_esc(t)}</span>" for t in r.tags)
+    return (
+        f"<tr><td>{i}</td>"
+        f"<td><a href='{_esc(r.link)}' target='_blank' rel='noopener'>{_esc(r.contest_id)}{_esc(r.index)} — {_esc(r.name)}</a></td>"
+        f"<td>{_esc(r.contest_name)}</td>"
+        f"<td>{_esc(r.rating)}</td>"
+        f"<td>{_esc(r.solved_count)}</td>"
+        f"<td>{tags_html}</td>"
+        f"<td>{_esc(r.division)}</td>"
+        f"</tr>"
+    )
+
+def iter_html(rows: Iterable[Problem], title: str) -> Iterator[str]:
+    """The HTML document for ``rows`` in pieces, rows newline-separated."""
+    yield html_head(title)
     for i, r in enumerate(rows, 1):
-        tags_html = " ".join(f"<span class='tag'>{esc(t)}</span>" for t in r["tags"])
-        rows_html.append(
-            f"<tr><td>{i}</td>"
-            f"<td><a href='{esc(r['link'])}' target='_blank' rel='noopener'>{esc(r['contestId'])}{esc(r['index'])} — {esc(r['name'])}</a></td>"
-            f"<td>{esc(r['contestName'])}</td>"
-            f"<td>{esc(r['rating'])}</td>"
-            f"<td>{esc(r['solvedCount'])}</td>"
-            f"<td>{tags_html}</td>"
-            f"<td>{esc(r['division'])}</td>"
-            f"</tr>"
-        )
-    foot = "</tbody></table></body></html>"
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(head + "\n".join(rows_html) + foot)
+        yield html_row(i, r) if i == 1 else "\n" + html_row(i, r)
+    yield HTML_FOOT
+
+def write_html(path: str, rows: Iterable[Problem], title: str):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8", buffering=WRITE_BUFFER) as f:
+        f.writelines(iter_html(rows, title))
+
+# ---------------------- Batch ----------------------
+
+def load_matrix(path: str, any_tags: Iterable[str] = (), all_tags: Iterable[str] = (),
+                exclude_tags: Iterable[str] = ()) -> List[dict]:
+    """
+    Expand a matrix spec into one job per ladder entry and sort. Top-level
+    "divisions", "indices", "sorts", "limit", "tags", "all_tags" and
+    "exclude_tags" are defaults that each entry of "ladders" may override;
+    every entry has "rating" or "range". An optional "combined" entry produces
+    combined_ladder.csv/.html. The tag arguments (from --tags, --all-tags and
+    --exclude-tags) apply where the spec sets no tag filter of that kind.
+    """
+    with open(path, encoding="utf-8") as f:
+        spec = json.load(f)
+    tag_defaults = {"tags": list(any_tags), "all_tags": list(all_tags), "exclude_tags": list(exclude_tags)}
+    entries = [dict(e) for e in spec.get("ladders", [])]
+    if spec.get("combined"):
+        entries.append(dict(spec["combined"], combined=True))
+    jobs = []
+    for e in entries:
+        if ("rating" in e) == ("range" in e):
+            raise ValueError(f"{path}: each ladder needs exactly one of 'rating' or 'range': {e}")
+        lo, hi = e.get("range", (None, None))
+        for sort_key in e.get("sorts", spec.get("sorts", ["solved"])):
+            if sort_key not in SORT_KEYS:
+                raise ValueError(f"{path}: unknown sort {sort_key!r}")
+            jobs.append({
+                "divisions": e.get("divisions", spec.get("divisions", [])),
+                "indices": e.get("indices", spec.get("indices", ["A", "B", "C", "D", "E", "F"])),
+                "exact_rating": e.get("rating"),
+                "min_rating": lo,
+                "max_rating": hi,
+                "sort_key": sort_key,
+                "limit": e.get("limit", spec.get("limit", 0)),
+                "combined": e.get("combined", False),
+                **{key: e.get(key, spec.get(key, default)) for key, default in tag_defaults.items()},
+            })
+    return jobs
+
+def plan_batch(index: ProblemIndex, jobs: List[dict], solved_set: set, outdir: str,
+               keep: Optional[np.ndarray] = None) -> List[tuple]:
+    """(writer, path, ids, title) for every file of every job; one filter pass per job."""
+    files = []
+    for job in jobs:
+        ids = select_ids(index, job["divisions"], job["indices"], job["exact_rating"],
+                         job["min_rating"], job["max_rating"], solved_set, job["sort_key"], job["limit"],
+                         job["tags"], job["all_tags"], job["exclude_tags"], keep=keep)
+        exact, lo, hi = job["exact_rating"], job["min_rating"], job["max_rating"]
+        band = f"{exact}" if exact is not None else f"{lo}-{hi}"
+        suffix = "" if job["sort_key"] == "solved" else f"_{job['sort_key']}"
+        if job["combined"]:
+            groups = [(f"combined_ladder{suffix}", "Codeforces Ladder — combined", ids)]
+        else:
+            groups = [(f"{div}_{idx}_rating_{band}{suffix}", f"Codeforces Ladder — {div.upper()} {idx} {band}", g)
+                      for (div, idx), g in group_ids(index, ids)]
+        for base, title, g in groups:
+            files.append(("csv", os.path.join(outdir, base + ".csv"), g, title))
+            files.append(("html", os.path.join(outdir, base + ".html"), g, title))
+    return files
+
+def _digest(path: str) -> bytes:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(WRITE_BUFFER), b""):
+            h.update(block)
+    return h.digest()
+
+def write_if_changed(path: str, write, *args) -> bool:
+    """Render through ``write(tmp_path, *args)`` and replace ``path`` only if the content hash differs."""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    write(tmp, *args)
+    if os.path.exists(path) and _digest(tmp) == _digest(path):
+        os.remove(tmp)
+        return False
+    os.replace(tmp, path)
+    return True
+
+_batch_index: Optional[ProblemIndex] = None
+
+def _init_batch_worker(index: ProblemIndex):
+    global _batch_index
+    _batch_index = index
+
+def _render_file(kind: str, path: str, ids: np.ndarray, title: str) -> bool:
+    rows = iter_rows(_batch_index, ids)
+    if kind == "csv":
+        return write_if_changed(path, write_csv, rows)
+    return write_if_changed(path, write_html, rows, title)
+
+def run_batch(index: ProblemIndex, jobs: List[dict], solved_set: set, outdir: str, workers: int = 0,
+              keep: Optional[np.ndarray] = None):
+    files = metrics.timed("filter", plan_batch, index, jobs, solved_set, outdir, keep)
+    os.makedirs(outdir, exist_ok=True)
+    workers = min(workers or os.cpu_count() or 1, len(files))
+    with metrics.stage("render"):
+        if workers <= 1:
+            _init_batch_worker(index)
+            changed = [_render_file(*f) for f in files]
+        else:
+            with ProcessPoolExecutor(workers, initializer=_init_batch_worker, initargs=(index,)) as pool:
+                changed = list(pool.map(_render_file, *zip(*files), chunksize=8))
+    print(f"Batch: {len(jobs)} ladders, {len(files)} files, {sum(changed)} written, "
+          f"{len(files) - sum(changed)} unchanged")
 
 # ---------------------- CLI ----------------------
 
@@ -210,15 +255,46 @@ def parse_args():
     group = p.add_mutually_exclusive_group(required=True)
     group.add_argument("--rating", type=int, help="Exact rating (e.g., 1200)")
     group.add_argument("--range", nargs=2, type=int, metavar=("MIN", "MAX"), help="Rating range inclusive")
+    group.add_argument("--batch", metavar="SPEC",
+                       help="Build every ladder in a JSON matrix spec (see ladder_matrix.json) from one fetch; "
+                            "files whose content is unchanged are not rewritten; --tags, --all-tags and "
+                            "--exclude-tags apply to each ladder that sets no tag filter of its own")
+    p.add_argument("--tags", nargs="+", default=[], metavar="TAG",
+                   help="Keep problems with at least one of these tags (quote multi-word tags)")
+    p.add_argument("--all-tags", nargs="+", default=[], metavar="TAG", help="Keep problems with all of these tags")
+    p.add_argument("--exclude-tags", nargs="+", default=[], metavar="TAG", help="Drop problems with any of these tags")
     p.add_argument("--handle", "-u", type=str, help="Your Codeforces handle to exclude solved problems")
+    p.add_argument("--handles", nargs="+", default=[], metavar="HANDLE",
+                   help="Build one ladder for a group of handles (see --solved-by)")
+    p.add_argument("--solved-by", choices=GROUP_MODES, default="unsolved",
+                   help="With --handles: keep problems solved by none (default), any, all or at least --k of them")
+    p.add_argument("--k", type=int, default=1, help="Threshold for --solved-by atleast")
     p.add_argument("--outdir", default="ladders", help="Output directory")
-    p.add_argument("--sort", choices=["solved", "rating", "newest", "oldest"], default="solved")
-    p.add_argument("--limit", type=int, default=0, help="Keep only top N after sort (0=no limit)")
+    p.add_argument("--sort", choices=SORT_KEYS + (RECOMMENDED,), default="solved",
+                   help=f"{RECOMMENDED}: the problems best pitched at --handle's rating and weaker tags")
+    p.add_argument("--limit", type=int, default=0,
+                   help=f"Keep only top N after sort (0=no limit; {DEFAULT_LIMIT} for --sort {RECOMMENDED})")
     p.add_argument("--combine", action="store_true", help="Make one combined file instead of many per division+index")
-    return p.parse_args()
+    p.add_argument("--snapshot", default=snapshot.DEFAULT_PATH, metavar="PATH",
+                   help="Snapshot file used as a cache of contests/problems (shared with the backend)")
+    p.add_argument("--offline", action="store_true", help="Read contests/problems from --snapshot only, no network")
+    p.add_argument("--jobs", "-j", type=int, default=0, help="Worker processes for --batch rendering (0=CPU count)")
+    p.add_argument("--profile", action="store_true", help="Print a per-stage timing breakdown to stderr")
+    args = p.parse_args()
+    if args.handles and not 1 <= args.k <= len(args.handles):
+        p.error(f"--k must be between 1 and the number of --handles ({len(args.handles)})")
+    return args
 
 def main():
     args = parse_args()
+    timings = metrics.collect()
+    try:
+        build_ladders(args)
+    finally:
+        if args.profile:
+            print("\nStage timings:\n" + timings.report(), file=sys.stderr)
+
+def build_ladders(args):
     exact_rating = args.rating
     min_rating = max_rating = None
     if args.range:
@@ -226,39 +302,66 @@ def main():
         if min_rating > max_rating:
             print("Error: MIN cannot be greater than MAX", file=sys.stderr)
             sys.exit(1)
+    jobs = load_matrix(args.batch, args.tags, args.all_tags, args.exclude_tags) if args.batch else None
+    if args.handle and args.handles:
+        print("Error: use either --handle or --handles", file=sys.stderr)
+        sys.exit(1)
+    if args.offline and (args.handle or args.handles):
+        print("Error: --handle needs network access and cannot be combined with --offline", file=sys.stderr)
+        sys.exit(1)
+    recommending = args.sort == RECOMMENDED
+    if recommending and (not args.handle or args.batch):
+        print(f"Error: --sort {RECOMMENDED} needs --handle and cannot be combined with --batch", file=sys.stderr)
+        sys.exit(1)
 
-    print("Fetching contest list...")
-    contest_map = fetch_contests()
-    print("Fetching problems...")
-    problems, solved_map = fetch_problemset()
+    if args.offline:
+        print("Loading contest list and problems from snapshot...")
+    else:
+        who = args.handle or (f"{len(args.handles)} handles" if args.handles else None)
+        print("Fetching contest list and problems" + (f" and solved problems for {who}..." if who else "..."))
+    # every handle's solved set is fetched concurrently; the scheduler keeps them within the rate limit
+    contest_map, (problems, solved_map), solved_set, rating, *group_sets = upstream.parallel(
+        lambda: metrics.timed("contests", fetch_contests, args.snapshot, args.offline),
+        lambda: metrics.timed("problemset", fetch_problemset, args.snapshot, args.offline),
+        lambda: metrics.timed("solved", fetch_solved_problems, args.handle) if args.handle else set(),
+        lambda: metrics.timed("rating", download_rating, args.handle) if recommending else None,
+        *(lambda h=h: metrics.timed("solved", fetch_solved_problems, h) for h in args.handles),
+    )
     print(f"Total problems fetched: {len(problems)}")
-
-    solved_set = set()
     if args.handle:
-        print(f"Fetching solved problems for {args.handle}...")
-        solved_set = fetch_solved_problems(args.handle)
         print(f"Total solved problems: {len(solved_set)}")
+    if recommending:
+        print(f"Rating of {args.handle}: {rating if rating is not None else 'unrated'}")
+    for h, solved in zip(args.handles, group_sets):
+        print(f"Solved by {h}: {len(solved)}")
 
-    rows = filter_and_annotate(
-        problems=problems,
-        solved_map=solved_map,
-        contest_map=contest_map,
+    index = metrics.timed("index", ProblemIndex.from_problems, problems, solved_map, contest_map)
+    keep = metrics.timed("group", index.group_mask, group_sets, args.solved_by, args.k) if args.handles else None
+    if args.batch:
+        run_batch(index, jobs, solved_set, args.outdir, args.jobs, keep)
+        return
+    ids = metrics.timed("filter", lambda: select_ids(
+        index=index,
         wanted_divisions=args.divisions or [],
         wanted_indices=args.indices,
         exact_rating=exact_rating,
         min_rating=min_rating,
         max_rating=max_rating,
         solved_set=solved_set,
-    )
+        sort_key=args.sort,
+        limit=0 if recommending else max(args.limit, 0),
+        any_tags=args.tags,
+        all_tags=args.all_tags,
+        exclude_tags=args.exclude_tags,
+        keep=keep,
+    ))
+    if recommending:
+        ids = metrics.timed("recommend", recommend, index, ids, solved_set, rating, max(args.limit, 0) or DEFAULT_LIMIT)
 
-    if not rows:
+    if not len(ids):
         print("No problems matched your filters.")
         return
 
-    rows = sort_rows(rows, args.sort)
-    if args.limit and args.limit > 0:
-        rows = rows[: args.limit]
-
     os.makedirs(args.outdir, exist_ok=True)
 
     def make_base_name(div: str, idx: str) -> str:
@@ -270,29 +373,24 @@ def main():
         title = "Codeforces Ladder — combined"
         csv_path = os.path.join(args.outdir, f"combined_ladder.csv")
         html_path = os.path.join(args.outdir, f"combined_ladder.html")
-        write_csv(csv_path, rows)
-        write_html(html_path, rows, title)
+        metrics.timed("write_csv", write_csv, csv_path, iter_rows(index, ids))
+        metrics.timed("write_html", write_html, html_path, iter_rows(index, ids), title)
         print(f"Wrote combined CSV: {csv_path}")
         print(f"Wrote combined HTML: {html_path}")
-        print(f"Problems: {len(rows)}")
+        print(f"Problems: {len(ids)}")
         return
 
-    groups: Dict[Tuple[str, str], List[dict]] = {}
-    for r in rows:
-        key = (r["division"], r["index"])
-        groups.setdefault(key, []).append(r)
-
     total = 0
-    for (div, idx), group_rows in groups.items():
+    for (div, idx), group in group_ids(index, ids):
         base = make_base_name(div, idx)
         csv_path = os.path.join(args.outdir, base + ".csv")
         html_path = os.path.join(args.outdir, base + ".html")
-        write_csv(csv_path, group_rows)
+        metrics.timed("write_csv", write_csv, csv_path, iter_rows(index, group))
         title = f"Codeforces Ladder — {div.upper()} {idx} " + (f"{exact_rating}" if exact_rating else f"{min_rating}-{max_rating}")
-        write_html(html_path, group_rows, title)
-        print(f"Wrote: {csv_path}  ({len(group_rows)} problems)")
+        metrics.timed("write_html", write_html, html_path, iter_rows(index, group), title)
+        print(f"Wrote: {csv_path}  ({len(group)} problems)")
         print(f"      {html_path}")
-        total += len(group_rows)
+        total += len(group)
 
     print(f"Total problems written: {total}")
 
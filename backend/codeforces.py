@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# backend/codeforces.py
+"""
+Fetching and filtering shared by the API (app.py) and the CLI
+(cf_division_ladder.py).
+
+download_*() call the Codeforces API through upstream (pooled, rate limited;
+the *_async variants without blocking an event loop), *_from() turn raw
+results into what ProblemIndex is built from, and query_mask() / select_ids()
+apply the ladder filters to an index. Caching and snapshot policy stay with
+the callers.
+"""
+
+import asyncio
+import os
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+import metrics
+import upstream
+from problem_index import ContestMap, ProblemIndex
+
+# point at a stand-in (e.g. benchmarks/stub_server.py) to run without touching Codeforces
+API_BASE = os.environ.get("CF_API_BASE", "https://codeforces.com/api").rstrip("/")
+PROBLEMS_URL = f"{API_BASE}/problemset.problems"
+CONTESTS_URL = f"{API_BASE}/contest.list"
+USER_SUBMISSIONS_URL = f"{API_BASE}/user.status"
+USER_INFO_URL = f"{API_BASE}/user.info"
+
+# ---------------------- Fetch data ----------------------
+
+def api_result(url: str, what: str, params=None, priority: int = upstream.INTERACTIVE):
+    """``result`` of a Codeforces API call; raises on HTTP errors and non-OK statuses."""
+    r = upstream.get(url, params=params, priority=priority)
+    r.raise_for_status()
+    with metrics.stage(f"parse_{what}"):
+        data = r.json()
+    if data.get("status") != "OK":
+        raise RuntimeError(f"Failed to fetch {what} from Codeforces API")
+    return data["result"]
+
+def download_contests() -> List[list]:
+    """[[id, name], ...] for every non-gym contest."""
+    result = api_result(CONTESTS_URL, "contests", params={"gym": False}, priority=upstream.BACKGROUND)
+    return [[c["id"], c.get("name", "")] for c in result]
+
+def download_problemset() -> dict:
+    return api_result(PROBLEMS_URL, "problemset", priority=upstream.BACKGROUND)
+
+def _submissions_params(handle: str, start: Optional[int], count: Optional[int]) -> dict:
+    params = {"handle": handle}
+    if start is not None:
+        params.update({"from": start, "count": count})
+    return params
+
+def download_submissions(handle: str, start: Optional[int] = None, count: Optional[int] = None) -> List[dict]:
+    """A handle's submissions, newest first; start/count None means the whole history."""
+    return api_result(USER_SUBMISSIONS_URL, "submissions", params=_submissions_params(handle, start, count))
+
+def download_rating(handle: str) -> Optional[int]:
+    """A handle's current rating, None if it has never been rated."""
+    return rating_from(api_result(USER_INFO_URL, "user_info", params={"handles": handle}))
+
+async def api_result_async(url: str, what: str, params=None):
+    """api_result() without blocking the event loop; the body is decoded on a worker thread."""
+    r = await upstream.async_upstream.get(url, params=params)
+    r.raise_for_status()
+    with metrics.stage(f"parse_{what}"):
+        data = await asyncio.to_thread(r.json)
+    if data.get("status") != "OK":
+        raise RuntimeError(f"Failed to fetch {what} from Codeforces API")
+    return data["result"]
+
+async def download_submissions_async(handle: str, start: Optional[int] = None,
+                                     count: Optional[int] = None) -> List[dict]:
+    return await api_result_async(USER_SUBMISSIONS_URL, "submissions", params=_submissions_params(handle, start, count))
+
+async def download_rating_async(handle: str) -> Optional[int]:
+    return rating_from(await api_result_async(USER_INFO_URL, "user_info", params={"handles": handle}))
+
+def contest_map_from(contests: Iterable[list]) -> ContestMap:
+    return ContestMap((cid, name) for cid, name in contests)
+
+def problemset_from(result: dict) -> Tuple[List[dict], Dict[Tuple[int, str], int]]:
+    problems = result["problems"]
+    stats = result.get("problemStatistics", [])
+    solved_map = {(s["contestId"], s["index"]): s.get("solvedCount", 0) for s in stats}
+    return problems, solved_map
+
+def rating_from(users: List[dict]) -> Optional[int]:
+    return users[0].get("rating") if users else None
+
+def solved_from(submissions: Iterable[dict]) -> Set[Tuple[int, str]]:
+    """(contestId, index) of every problem with an accepted submission."""
+    solved = set()
+    for sub in submissions:
+        if sub.get("verdict") == "OK":
+            pid = sub.get("problem", {})
+            solved.add((pid.get("contestId"), pid.get("index")))
+    return solved
+
+# ---------------------- Filtering ----------------------
+
+def query_mask(index: ProblemIndex, min_rating: Optional[int] = None, max_rating: Optional[int] = None,
+               indices: Iterable[str] = (), divisions: Iterable[str] = (), any_tags: Iterable[str] = (),
+               all_tags: Iterable[str] = (), exclude_tags: Iterable[str] = (), exact_rating: Optional[int] = None,
+               prefix: bool = False) -> np.ndarray:
+    """
+    Problems passing the rating, index, division and tag filters; empty
+    filters keep everything. With ``prefix`` an index matches by prefix
+    (B matches B1, B2), otherwise exactly.
+    """
+    mask = index.rating_mask(min_rating, max_rating, exact_rating)
+    if indices:
+        mask &= index.index_mask(indices, prefix=prefix)
+    if divisions:
+        mask &= index.division_mask(divisions)
+    if any_tags or all_tags or exclude_tags:
+        mask &= index.tag_mask(any_tags, all_tags, exclude_tags)
+    return mask
+
+def select_ids(
+    index: ProblemIndex,
+    wanted_divisions: List[str],
+    wanted_indices: List[str],
+    exact_rating: Optional[int],
+    min_rating: Optional[int],
+    max_rating: Optional[int],
+    solved_set: Optional[set] = None,
+    sort_key: str = "solved",
+    limit: int = 0,
+    any_tags: Iterable[str] = (),
+    all_tags: Iterable[str] = (),
+    exclude_tags: Iterable[str] = (),
+    keep: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Row ids of unsolved problems matching the filters, in ``sort_key`` order and
+    cut to the first ``limit`` rows (0 = all). Indices match by prefix (B matches B1, B2).
+    Tag filters: at least one of ``any_tags``, all of ``all_tags``, none of ``exclude_tags``.
+    ``keep`` is an extra mask over all problems (e.g. ProblemIndex.group_mask for --handles).
+    """
+    # an empty index list still goes through index_mask, which then matches nothing
+    mask = query_mask(index, min_rating, max_rating, (), wanted_divisions, any_tags, all_tags, exclude_tags,
+                      exact_rating)
+    mask &= index.index_mask(wanted_indices or [], prefix=True)
+    if solved_set:
+        mask &= ~index.solved_mask(solved_set)
+    if keep is not None:
+        mask &= keep
+    return index.ordered(mask, sort_key, limit)
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# backend/fragments.py
+"""
+Pre-serialised JSON for ladder rows.
+
+Each problem's row is encoded once per index generation and field projection,
+split around its per-user "solved" value. A response body is then just the
+fragments of the selected rows joined with the handle's solved flag spliced
+in, byte for byte what jsonify() produces for the same rows (sorted keys,
+compact separators, ASCII-only, trailing newline). stream() yields the same
+body (or NDJSON) in chunks so a response can start before the last row is
+encoded.
+"""
+
+import json
+import threading
+from typing import Iterable, Iterator, Optional, Sequence
+
+from problem_index import ProblemIndex
+
+_SOLVED = b'"solved":false'
+_FLAG = (b"false", b"true")
+STREAM_CHUNK = 1 << 16
+
+
+def _encode(row: dict) -> bytes:
+    return json.dumps(row, sort_keys=True, separators=(",", ":"), ensure_ascii=True).encode("ascii")
+
+
+class RowFragments:
+    """Lazily built (key, prefix, suffix) per row; the solved flag goes between prefix and suffix."""
+
+    def __init__(self, index: ProblemIndex, fields: Sequence[str]):
+        self.index = index
+        self.fields = tuple(fields)
+        self._rows: list = [None] * index.size
+        self._lock = threading.Lock()
+
+    def fragment(self, i: int):
+        frag = self._rows[i]
+        if frag is None:
+            row = self.index.row(i)
+            key = (row["contestId"], row["index"])
+            row["solved"] = False
+            data = _encode({f: row[f] for f in self.fields})
+            if "solved" in self.fields:
+                pre, _, post = data.partition(_SOLVED)
+                frag = (key, pre + b'"solved":', post)
+            else:
+                frag = (key, data, None)
+            with self._lock:
+                self._rows[i] = frag
+        return frag
+
+    def iter_rows(self, ids: Iterable[int], solved_set: Optional[set]) -> Iterator[bytes]:
+        """Encoded rows for ``ids`` in order, each one a complete JSON object."""
+        for i in ids:
+            key, pre, post = self.fragment(int(i))
+            if post is None:
+                yield pre
+            else:
+                yield pre + _FLAG[bool(solved_set) and key in solved_set] + post
+
+    def encode(self, ids: Iterable[int], solved_set: Optional[set]) -> bytes:
+        """JSON array of the rows for ``ids``."""
+        return b"[" + b",".join(self.iter_rows(ids, solved_set)) + b"]\n"
+
+    def stream(self, ids: Iterable[int], solved_set: Optional[set], ndjson: bool = False,
+               chunk: int = STREAM_CHUNK) -> Iterator[bytes]:
+        """The body of encode() (or one row per line with ``ndjson``) in chunks of roughly ``chunk`` bytes."""
+        buf, size = ([] if ndjson else [b"["]), 0
+        for n, row in enumerate(self.iter_rows(ids, solved_set)):
+            if ndjson:
+                buf += (row, b"\n")
+            else:
+                buf += (b",", row) if n else (row,)
+            size += len(row) + 1
+            if size >= chunk:
+                yield b"".join(buf)
+                buf, size = [], 0
+        if not ndjson:
+            buf.append(b"]\n")
+        if buf:
+            yield b"".join(buf)
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# backend/metrics.py
+"""
+Hot-path instrumentation without external dependencies.
+
+stage(name) times a block, feeds a per-stage latency histogram and, if the
+current context is collecting (see collect()), appends the timing to the
+collector so a request can report it in a Server-Timing header or the CLI
+can print it with --profile. render() produces Prometheus text format.
+Metrics are per process; scrape each gunicorn worker or aggregate upstream.
+"""
+
+import contextlib
+import contextvars
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SIZE_BUCKETS = (1e3, 1e4, 5e4, 1e5, 5e5, 1e6, 5e6)
+
+_lock = threading.Lock()
+_collector: contextvars.ContextVar = contextvars.ContextVar("stage_collector", default=None)
+# the stage the current code runs inside, if any; a stage started there is nested in it
+_current_stage: contextvars.ContextVar = contextvars.ContextVar("current_stage", default=None)
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: Tuple[float, ...], label: str):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self.label = label
+        self._series: Dict[str, list] = {}   # label value -> [bucket counts..., sum, count]
+
+    def observe(self, label_value: str, value: float):
+        with _lock:
+            s = self._series.get(label_value)
+            if s is None:
+                s = self._series[label_value] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    s[i] += 1
+            s[-2] += value
+            s[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with _lock:
+            for lv, s in sorted(self._series.items()):
+                for bound, n in zip(self.buckets, s):
+                    lines.append(f'{self.name}_bucket{{{self.label}="{lv}",le="{bound:g}"}} {n}')
+                lines.append(f'{self.name}_bucket{{{self.label}="{lv}",le="+Inf"}} {s[-1]}')
+                lines.append(f'{self.name}_sum{{{self.label}="{lv}"}} {s[-2]:.6f}')
+                lines.append(f'{self.name}_count{{{self.label}="{lv}"}} {s[-1]}')
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...]):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values: Dict[tuple, float] = {}
+
+    def inc(self, *label_values, amount: float = 1):
+        with _lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with _lock:
+            for lvs, v in sorted(self._values.items()):
+                labels = ",".join(f'{k}="{lv}"' for k, lv in zip(self.labels, lvs))
+                lines.append(f"{self.name}{{{labels}}} {v:g}")
+        return lines
+
+
+STAGE_SECONDS = Histogram("cf_stage_seconds", "Time spent per pipeline stage.", LATENCY_BUCKETS, "stage")
+STAGE_ERRORS = Counter("cf_stage_errors_total", "Stages that raised.", ("stage",))
+UPSTREAM_CALLS = Counter("cf_upstream_requests_total", "Codeforces API calls by method and outcome.",
+                         ("method", "outcome"))
+SNAPSHOT_CHANGES = Counter("cf_snapshot_changes_total", "Problems added, removed or changed by index refreshes.",
+                           ("kind",))
+REQUESTS_ABORTED = Counter("cf_requests_aborted_total", "Requests given up before a response (deadline, disconnect).",
+                           ("endpoint", "reason"))
+RESPONSE_BYTES = Histogram("cf_response_bytes", "Response body size per endpoint.", SIZE_BUCKETS, "endpoint")
+
+_caches: Dict[str, object] = {}
+
+
+def register_cache(name: str, cache):
+    """Report ``cache.hits`` / ``cache.misses`` under ``name`` in render()."""
+    _caches[name] = cache
+
+
+def counted_body(endpoint: str, chunks):
+    """Yield a streamed body's chunks; their total size goes to RESPONSE_BYTES when the stream ends or is closed."""
+    sent = 0
+    try:
+        for chunk in chunks:
+            sent += len(chunk)
+            yield chunk
+    finally:
+        RESPONSE_BYTES.observe(endpoint, sent)
+
+
+@contextlib.contextmanager
+def stage(name: str):
+    parent = _current_stage.get()
+    token = _current_stage.set(name)
+    t0 = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        STAGE_ERRORS.inc(name)
+        collected = _collector.get()
+        if collected is not None and collected.failed is None:
+            collected.failed = name
+        raise
+    finally:
+        dt = time.perf_counter() - t0
+        _current_stage.reset(token)
+        STAGE_SECONDS.observe(name, dt)
+        collected = _collector.get()
+        if collected is not None:
+            collected.append((name, dt))
+            collected.parents.setdefault(name, parent)
+
+
+def timed(name: str, fn, *args):
+    """Call fn(*args) inside stage(name)."""
+    with stage(name):
+        return fn(*args)
+
+
+class Timings(list):
+    """(stage, seconds) pairs recorded in one request / CLI run; ``failed`` is the first stage that raised."""
+    failed: Optional[str] = None
+
+    def __init__(self):
+        super().__init__()
+        self.parents: Dict[str, Optional[str]] = {}   # stage -> the stage it ran inside (None: top level)
+
+    def server_timing(self) -> str:
+        return ", ".join(f"{name};dur={dt * 1000:.1f}" for name, dt in self)
+
+    def report(self) -> str:
+        """
+        Human-readable table; repeated stages are summed and their call count
+        shown. Nested stages are indented under the stage they ran in and have
+        no share of the total, which only the top-level stages add up to.
+        """
+        agg: Dict[str, list] = {}
+        for name, dt in self:
+            a = agg.setdefault(name, [0.0, 0])
+            a[0] += dt
+            a[1] += 1
+        children: Dict[Optional[str], List[str]] = {}
+        for name in agg:
+            parent = self.parents.get(name)
+            # a parent recorded elsewhere (or still running) leaves its children at the top level
+            children.setdefault(parent if parent in agg and parent != name else None, []).append(name)
+        total = sum(agg[name][0] for name in children.get(None, ())) or 1.0
+        lines = []
+
+        def add(name: str, depth: int):
+            dt, n = agg[name]
+            share = f"{dt / total:6.1%}" if depth == 0 else " " * 6
+            lines.append((depth, name, f"{dt * 1000:9.1f} ms  {share}  x{n}"))
+            for child in children.get(name, ()):
+                add(child, depth + 1)
+        for name in children.get(None, ()):
+            add(name, 0)
+        width = max((2 * depth + len(name) for depth, name, _ in lines), default=5)
+        return "\n".join(f"  {'  ' * depth + name:<{width}}  {rest}" for depth, name, rest in lines)
+
+
+def collect() -> Timings:
+    """Start collecting stage timings for the current context (request or CLI run)."""
+    timings = Timings()
+    _collector.set(timings)
+    return timings
+
+
+def render() -> str:
+    lines = []
+    for m in (STAGE_SECONDS, STAGE_ERRORS, UPSTREAM_CALLS, SNAPSHOT_CHANGES, REQUESTS_ABORTED, RESPONSE_BYTES):
+        lines.extend(m.render())
+    lines += ["# HELP cf_cache_hits_total Cache lookups served from memory.", "# TYPE cf_cache_hits_total counter"]
+    lines += [f'cf_cache_hits_total{{cache="{n}"}} {c.hits}' for n, c in sorted(_caches.items())]
+    lines += ["# HELP cf_cache_misses_total Cache lookups that had to load.", "# TYPE cf_cache_misses_total counter"]
+    lines += [f'cf_cache_misses_total{{cache="{n}"}} {c.misses}' for n, c in sorted(_caches.items())]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+# backend/problem_index.py
+"""
+Columnar index over one problemset snapshot.
+
+The problem dicts returned by problemset.problems are turned once into NumPy
+columns (rating, contestId, index code, division code, solvedCount) so that
+rating / index / division / solved filters become boolean masks. Tags get
+an inverted index (tag -> mask of the problems carrying it), so tag filters
+are a few ANDs/ORs of precomputed masks. The four
+ladder orderings are precomputed as permutations, so a filtered result comes
+out sorted by walking a permutation against the mask. Row dicts are only
+built for the problems that survive the filters.
+
+On refresh, diff() compares two indexes row by row (added / removed problems,
+changed ratings, solved counts and contents) and ProblemIndex.refreshed()
+reuses every sort permutation and the tag index that the delta leaves valid.
+"""
+
+import hashlib
+import re
+import sys
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+DIVISIONS = ("unknown", "div1", "div2", "div3", "div4")
+NO_RATING = -1
+SORT_KEYS = ("solved", "rating", "newest", "oldest")
+# how a group of handles' solved sets select problems: solved by none / any / all / at least k of them
+GROUP_MODES = ("unsolved", "any", "all", "atleast")
+
+_div_re = re.compile(r"div(?:\.|\s)?\s*([1-4])", flags=re.I)
+_division_re = re.compile(r"division\s*([1-4])", flags=re.I)
+_global_re = re.compile(r"\bglobal\s+round", flags=re.I)
+_educational_re = re.compile(r"\beducational\b", flags=re.I)
+
+
+def division_code(contest_name: str) -> int:
+    """
+    Position in DIVISIONS detected from a contest name (0 = unknown). The first
+    named division wins, so "Div. 1 + Div. 2" rounds count as div1; Global
+    rounds are combined rounds too (div1), Educational rounds are rated for
+    Div. 2 even when the name does not say so.
+    """
+    if not contest_name:
+        return 0
+    m = _div_re.search(contest_name) or _division_re.search(contest_name)
+    if m:
+        return int(m.group(1))
+    if _global_re.search(contest_name):
+        return 1
+    if _educational_re.search(contest_name):
+        return 2
+    return 0
+
+
+def _intern_tags(tag_lists: Iterable[Iterable[str]]) -> List[Tuple[str, ...]]:
+    """Tag lists as tuples of interned strings; problems with the same tags share one tuple."""
+    shared: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+    out = []
+    for tags in tag_lists:
+        key = tuple(sys.intern(t) for t in tags)
+        out.append(shared.setdefault(key, key))
+    return out
+
+
+class ContestMap(dict):
+    """contestId -> name, with every contest's division classified once, when the contest list is loaded."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # division code per contestId (indexed by id); ids not in the map are unknown (0)
+        self.division_codes = np.zeros(max(self, default=0) + 1, dtype=np.int8)
+        for cid, name in self.items():
+            self.division_codes[cid] = division_code(name)
+
+    def divisions_of(self, contest_ids: np.ndarray) -> np.ndarray:
+        """Division codes for an array of contest ids: one table lookup each, no regex."""
+        codes = self.division_codes
+        ids = np.clip(contest_ids, 0, len(codes) - 1)
+        return np.where(contest_ids < len(codes), codes[ids], 0).astype(np.int8)
+
+
+class Problem:
+    """One problem as a compact record built from the index columns; ``link`` is derived on access."""
+    __slots__ = ("contest_id", "contest_name", "index", "name", "rating", "tags", "solved_count", "division")
+
+    def __init__(self, contest_id: int, contest_name: str, index: str, name: str, rating: int,
+                 tags: Sequence[str], solved_count: int, division: str):
+        self.contest_id = contest_id
+        self.contest_name = contest_name
+        self.index = index
+        self.name = name
+        self.rating = rating
+        self.tags = tags
+        self.solved_count = solved_count
+        self.division = division
+
+    @property
+    def link(self) -> str:
+        return f"https://codeforces.com/contest/{self.contest_id}/problem/{self.index}"
+
+    def as_row(self) -> dict:
+        """The row dict served by the API and returned by filter_and_annotate."""
+        return {
+            "contestId": self.contest_id,
+            "contestName": self.contest_name,
+            "index": self.index,
+            "name": self.name,
+            "rating": self.rating,
+            "tags": list(self.tags),
+            "solvedCount": self.solved_count,
+            "link": self.link,
+            "division": self.division,
+        }
+
+
+class ProblemIndex:
+    """
+    Columns for one snapshot. ``names`` and ``tags`` only need to support
+    indexing by row id, so they can be plain lists or views over a mapped file.
+    """
+
+    def __init__(self, contest_id: np.ndarray, index_code: np.ndarray, rating: np.ndarray,
+                 division: np.ndarray, solved_count: np.ndarray, index_vocab: List[str],
+                 names: Sequence[str], tags: Sequence[List[str]], contest_map: Dict[int, str],
+                 orders: Optional[Dict[str, np.ndarray]] = None):
+        self.size = len(contest_id)
+        self.generation = 0   # set by the owner of the snapshot (usually digest()); changes whenever the data does
+        self.contest_id = contest_id
+        self.index_code = index_code
+        self.rating = rating
+        self.division = division
+        self.solved_count = solved_count
+        self.index_vocab = index_vocab
+        self.names = names
+        self.tags = tags
+        self.contest_map = contest_map
+        self._code_of = {s: i for i, s in enumerate(index_vocab)}
+        self._tag_masks: Optional[Dict[str, np.ndarray]] = None
+        self._tag_matrix: Optional[Tuple[Tuple[str, ...], np.ndarray]] = None
+
+        # (contestId, index) packed into one int64, sorted once for solved-set lookups
+        keys = (contest_id.astype(np.int64) << 16) | index_code
+        self._key_order = np.argsort(keys, kind="stable")
+        self._sorted_keys = keys[self._key_order]
+
+        self.orders = self._build_orders() if orders is None else orders
+
+    @classmethod
+    def from_problems(cls, problems: List[dict], solved_map: Dict[Tuple[int, str], int],
+                      contest_map: Dict[int, str], orders: Optional[Dict[str, np.ndarray]] = None) -> "ProblemIndex":
+        n = len(problems)
+        cids = [p.get("contestId") or 0 for p in problems]
+        idxs = [p.get("index", "") for p in problems]
+        # sorted vocabulary, so comparing codes orders the same way as comparing index strings
+        index_vocab = sorted(set(idxs))
+        code_of = {s: i for i, s in enumerate(index_vocab)}
+        if not isinstance(contest_map, ContestMap):
+            contest_map = ContestMap(contest_map)
+        contest_id = np.fromiter(cids, dtype=np.int32, count=n)
+        return cls(
+            contest_id=contest_id,
+            index_code=np.fromiter((code_of[i] for i in idxs), dtype=np.int16, count=n),
+            rating=np.fromiter((p.get("rating", NO_RATING) for p in problems), dtype=np.int32, count=n),
+            division=contest_map.divisions_of(contest_id),
+            solved_count=np.fromiter((solved_map.get((c, i), 0) for c, i in zip(cids, idxs)),
+                                     dtype=np.int64, count=n),
+            index_vocab=index_vocab,
+            names=[p.get("name", "") for p in problems],
+            tags=_intern_tags(p.get("tags", ()) for p in problems),
+            contest_map=contest_map,
+            orders=orders,
+        )
+
+    @classmethod
+    def refreshed(cls, previous: Optional["ProblemIndex"], problems: List[dict],
+                  solved_map: Dict[Tuple[int, str], int], contest_map: Dict[int, str]):
+        """(new index, IndexDelta against ``previous``); unchanged derived structures are shared, not rebuilt."""
+        index = cls.from_problems(problems, solved_map, contest_map, orders={})
+        if previous is None:
+            index.orders = index._build_orders()
+            return index, None
+        delta = diff(previous, index)
+        orders = {}
+        if delta.same_layout:
+            # newest / oldest only depend on (contestId, index), which a same-layout refresh cannot change
+            orders["newest"] = previous.orders["newest"]
+            orders["oldest"] = previous.orders["oldest"]
+            if not delta.rating_changed.any():
+                orders["rating"] = previous.orders["rating"]
+                if not delta.solved_changed.any():
+                    orders["solved"] = previous.orders["solved"]
+            if not delta.tags_changed.any():
+                index._tag_masks = previous._tag_masks
+                index._tag_matrix = previous._tag_matrix
+        index.orders = index._build_orders(skip=orders)
+        index.orders.update(orders)
+        return index, delta
+
+    def _build_orders(self, skip=()) -> Dict[str, np.ndarray]:
+        # np.lexsort sorts by the last key first
+        c, i, r, s = self.contest_id, self.index_code, self.rating, self.solved_count
+        keys = {
+            "solved": lambda: (i, c, r, -s),
+            "rating": lambda: (i, c, r),
+            "newest": lambda: (i, -c),
+            "oldest": lambda: (i, c),
+        }
+        return {name: np.lexsort(cols()) for name, cols in keys.items() if name not in skip}
+
+    # ---------------------- Masks ----------------------
+
+    def rating_mask(self, min_rating: Optional[int] = None, max_rating: Optional[int] = None,
+                    exact_rating: Optional[int] = None) -> np.ndarray:
+        mask = self.rating != NO_RATING
+        if exact_rating is not None:
+            return mask & (self.rating == exact_rating)
+        if min_rating is not None:
+            mask &= self.rating >= min_rating
+        if max_rating is not None:
+            mask &= self.rating <= max_rating
+        return mask
+
+    def index_mask(self, wanted: Iterable[str], prefix: bool = False) -> np.ndarray:
+        """Problems whose index equals (or, with prefix=True, starts with) one of ``wanted``, case-insensitively."""
+        wanted = [w.upper() for w in wanted]
+        if prefix:
+            codes = [c for c, s in enumerate(self.index_vocab) if s.upper().startswith(tuple(wanted))]
+        else:
+            codes = [c for c, s in enumerate(self.index_vocab) if s.upper() in wanted]
+        return np.isin(self.index_code, codes)
+
+    def division_mask(self, wanted: Iterable[str]) -> np.ndarray:
+        codes = [DIVISIONS.index(d.lower()) for d in wanted if d.lower() in DIVISIONS[1:]]
+        return np.isin(self.division, codes)
+
+    @property
+    def tag_masks(self) -> Dict[str, np.ndarray]:
+        """Inverted index: tag -> mask of the problems carrying it, built on first use."""
+        if self._tag_masks is None:
+            rows: Dict[str, List[int]] = {}
+            for i in range(self.size):
+                for t in self.tags[i]:
+                    rows.setdefault(t, []).append(i)
+            masks = {}
+            for t, ids in rows.items():
+                masks[t] = np.zeros(self.size, dtype=bool)
+                masks[t][ids] = True
+            self._tag_masks = masks
+        return self._tag_masks
+
+    @property
+    def tag_matrix(self) -> Tuple[Tuple[str, ...], np.ndarray]:
+        """(tags, tags x problems 0/1 float32 matrix) of tag_masks, to weigh every problem's tags in one product."""
+        if self._tag_matrix is None:
+            tags = tuple(sorted(self.tag_masks))
+            matrix = np.zeros((len(tags), self.size), dtype=np.float32)
+            for row, t in enumerate(tags):
+                matrix[row, self.tag_masks[t]] = 1.0
+            self._tag_matrix = (tags, matrix)
+        return self._tag_matrix
+
+    def tag_mask(self, any_of: Iterable[str] = (), all_of: Iterable[str] = (),
+                 none_of: Iterable[str] = ()) -> np.ndarray:
+        """Problems with at least one tag of ``any_of`` (if given), every tag of ``all_of`` and none of ``none_of``."""
+        masks = self.tag_masks
+        nothing = np.zeros(self.size, dtype=bool)
+        mask = np.ones(self.size, dtype=bool)
+        any_of = [t.lower() for t in any_of]
+        if any_of:
+            mask = nothing.copy()
+            for t in any_of:
+                mask |= masks.get(t, nothing)
+        for t in all_of:
+            mask &= masks.get(t.lower(), nothing)
+        for t in none_of:
+            if t.lower() in masks:
+                mask &= ~masks[t.lower()]
+        return mask
+
+    def solved_mask(self, solved_set) -> np.ndarray:
+        mask = np.zeros(self.size, dtype=bool)
+        if not solved_set or not self.size:
+            return mask
+        code_of = self._code_of
+        keys = np.fromiter(((cid << 16) | code_of[idx] for cid, idx in solved_set
+                            if isinstance(cid, int) and idx in code_of), dtype=np.int64)
+        pos = np.minimum(np.searchsorted(self._sorted_keys, keys), self.size - 1)
+        found = self._sorted_keys[pos] == keys
+        mask[self._key_order[pos[found]]] = True
+        return mask
+
+    def solver_counts(self, solved_sets: Sequence) -> np.ndarray:
+        """How many of ``solved_sets`` contain each problem."""
+        counts = np.zeros(self.size, dtype=np.uint16)
+        for solved in solved_sets:
+            counts += self.solved_mask(solved)
+        return counts
+
+    def group_mask(self, solved_sets: Sequence, mode: str = "unsolved", k: int = 1) -> np.ndarray:
+        """Problems solved by none / any / all / at least ``k`` of a group's solved sets (see GROUP_MODES)."""
+        counts = self.solver_counts(solved_sets)
+        if mode == "unsolved":
+            return counts == 0
+        if mode == "any":
+            return counts > 0
+        if mode == "all":
+            return counts == len(solved_sets)
+        if mode == "atleast":
+            return counts >= k
+        raise ValueError(f"Unknown group mode: {mode}")
+
+    def ordered(self, mask: np.ndarray, sort_key: str, limit: int = 0) -> np.ndarray:
+        """Row ids selected by ``mask`` in ``sort_key`` order (problemset order for unknown keys)."""
+        perm = self.orders.get(sort_key)
+        ids = np.flatnonzero(mask) if perm is None else perm[mask[perm]]
+        return ids[:limit] if limit > 0 else ids
+
+    # ---------------------- Rows ----------------------
+
+    def problem(self, i: int) -> Problem:
+        cid = int(self.contest_id[i])
+        return Problem(cid, self.contest_map.get(cid, ""), self.index_vocab[self.index_code[i]], self.names[i],
+                       int(self.rating[i]), self.tags[i], int(self.solved_count[i]), DIVISIONS[self.division[i]])
+
+    def row(self, i: int) -> dict:
+        return self.problem(i).as_row()
+
+    def digest(self) -> str:
+        """Hash of everything rows are built from: equal data gives the same value in every process."""
+        h = hashlib.sha1()
+        for column in (self.contest_id, self.index_code, self.rating, self.division, self.solved_count):
+            h.update(np.ascontiguousarray(column).tobytes())
+        rows = range(self.size)
+        for strings in (self.index_vocab, (self.names[i] for i in rows), (",".join(self.tags[i]) for i in rows),
+                        (f"{c}:{self.contest_map.get(int(c), '')}" for c in np.unique(self.contest_id))):
+            h.update("\0".join(strings).encode("utf-8"))
+            h.update(b"\1")
+        return h.hexdigest()[:16]
+
+
+# ---------------------- Diff ----------------------
+
+class IndexDelta:
+    """
+    Row-level difference between two indexes. Masks are over the new index
+    except ``removed`` (over the old one); ``row_map`` maps old row ids to new
+    ones (-1 for removed problems).
+    """
+    __slots__ = ("row_map", "same_layout", "added", "removed", "rating_changed", "solved_changed",
+                 "tags_changed", "touched")
+
+    def summary(self) -> Dict[str, int]:
+        return {
+            "added": int(self.added.sum()),
+            "removed": int(self.removed.sum()),
+            "rating_changed": int(self.rating_changed.sum()),
+            "solved_changed": int(self.solved_changed.sum()),
+            "content_changed": int((self.touched & ~self.added & ~self.rating_changed).sum()),
+        }
+
+
+def diff(old: ProblemIndex, new: ProblemIndex) -> IndexDelta:
+    """Match rows by (contestId, index) and report what changed between ``old`` and ``new``."""
+    d = IndexDelta()
+    # translate old index codes into the new vocabulary (-1: letter no longer exists)
+    trans = np.array([new._code_of.get(v, -1) for v in old.index_vocab] or [-1], dtype=np.int64)
+    codes = trans[old.index_code]
+    keys = (old.contest_id.astype(np.int64) << 16) | np.maximum(codes, 0)
+    pos = np.minimum(np.searchsorted(new._sorted_keys, keys), max(new.size - 1, 0))
+    found = (codes >= 0) & (new._sorted_keys[pos] == keys) if new.size else np.zeros(old.size, dtype=bool)
+    d.row_map = np.where(found, new._key_order[pos] if new.size else -1, -1)
+    d.removed = ~found
+    d.same_layout = old.size == new.size and bool((d.row_map == np.arange(old.size)).all())
+
+    o = np.flatnonzero(found)
+    n = d.row_map[o]
+    d.added = np.ones(new.size, dtype=bool)
+    d.added[n] = False
+    d.rating_changed = np.zeros(new.size, dtype=bool)
+    d.rating_changed[n] = old.rating[o] != new.rating[n]
+    d.solved_changed = np.zeros(new.size, dtype=bool)
+    d.solved_changed[n] = old.solved_count[o] != new.solved_count[n]
+    d.tags_changed = d.added.copy()
+    d.tags_changed[n] = [old.tags[a] != new.tags[b] for a, b in zip(o.tolist(), n.tolist())]
+    content = np.zeros(new.size, dtype=bool)
+    content[n] = (old.division[o] != new.division[n]) | np.fromiter(
+        (old.names[a] != new.names[b] or old.contest_map.get(c) != new.contest_map.get(c)
+         for a, b, c in zip(o.tolist(), n.tolist(), old.contest_id[o].tolist())), dtype=bool, count=len(o))
+    # rows whose filter columns or rendered content changed, or that did not exist before
+    d.touched = d.added | d.rating_changed | d.tags_changed | content
+    return d
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# backend/recommend.py
+"""
+"Next problems" for one handle.
+
+score() rates every problem of a ProblemIndex against a handle's profile in
+one vectorized pass: how close the problem's rating is to a target a little
+above the handle's rating, how much it exercises tags the handle has solved
+little of (from the solved set already fetched for the ladder, no extra API
+call), and how many people solved it (a well-trodden problem is a safer
+pick). top() keeps the best ``n`` candidates with a partial selection
+(np.argpartition), so only those ``n`` are sorted.
+
+The rating comes from user.info and is kept per handle for a while (Ratings);
+an unrated handle is placed by the ratings of the problems it has solved.
+"""
+
+import time
+from typing import Optional, Tuple
+
+import numpy as np
+
+from cache import LRUCache
+from problem_index import NO_RATING, ProblemIndex
+
+RECOMMENDED = "recommended"   # the sort key that selects this mode
+DEFAULT_LIMIT = 50            # problems returned when the request does not set a limit
+
+TARGET_OFFSET = 100   # aim this far above the handle's rating
+SPREAD = 250.0        # rating gap at which the fit has dropped to about 60%
+UNRATED_START = 800   # placement of a handle that is unrated and has solved nothing rated
+# relative weight of rating fit, tag novelty and popularity in the score
+WEIGHTS = (1.0, 0.35, 0.15)
+
+
+class Ratings:
+    """handle -> current Codeforces rating (None for unrated), refreshed after ``ttl`` seconds."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 3600.0):
+        self.ttl = ttl
+        self._cache = LRUCache(maxsize)
+
+    @property
+    def hits(self) -> int:
+        return self._cache.hits
+
+    @property
+    def misses(self) -> int:
+        return self._cache.misses
+
+    def cached(self, handle: str) -> Tuple[bool, Optional[int]]:
+        """(found, rating); found is False when the rating must be fetched."""
+        entry = self._cache.get(handle.lower())
+        if entry is None or time.monotonic() - entry[1] >= self.ttl:
+            return False, None
+        return True, entry[0]
+
+    def put(self, handle: str, rating: Optional[int]) -> Optional[int]:
+        self._cache.put(handle.lower(), (rating, time.monotonic()))
+        return rating
+
+
+def target_rating(index: ProblemIndex, solved: np.ndarray, rating: Optional[int]) -> int:
+    """Rating to aim at: the handle's rating, or for an unrated handle the upper quartile of what it solved."""
+    if rating is None:
+        done = index.rating[solved & (index.rating != NO_RATING)]
+        rating = int(np.percentile(done, 75)) if len(done) else UNRATED_START
+    return rating + TARGET_OFFSET
+
+
+def score(index: ProblemIndex, solved: np.ndarray, rating: Optional[int]) -> np.ndarray:
+    """Score of every problem (higher is better) for a handle with solved mask ``solved`` and ``rating``."""
+    fit_w, tag_w, pop_w = WEIGHTS
+    gap = (index.rating - target_rating(index, solved, rating)) / SPREAD
+    fit = np.exp(-0.5 * gap * gap)
+
+    # a tag's novelty is 1 - (problems solved with it / problems solved with the handle's most solved tag)
+    _, tags = index.tag_matrix
+    per_tag = tags @ solved.astype(np.float32)
+    novelty = 1.0 - per_tag / max(float(per_tag.max(initial=0.0)), 1.0)
+    tag_count = tags.sum(axis=0)
+    # a problem scores the mean novelty of its tags; untagged problems sit in the middle
+    tag_fit = np.divide(novelty @ tags, tag_count, out=np.full(index.size, 0.5, dtype=np.float32),
+                        where=tag_count > 0)
+
+    popularity = np.log1p(index.solved_count) / max(np.log1p(index.solved_count.max(initial=0)), 1.0)
+    return fit_w * fit + tag_w * tag_fit + pop_w * popularity
+
+
+def top(scores: np.ndarray, ids: np.ndarray, n: int) -> np.ndarray:
+    """The ``n`` best of ``ids`` by ``scores``, best first (ties: lower row id first)."""
+    if n <= 0 or not len(ids):
+        return ids[:0]
+    s = scores[ids]
+    if n < len(ids):
+        best = np.argpartition(-s, n - 1)[:n]
+        ids, s = ids[best], s[best]
+    return ids[np.lexsort((ids, -s))]
+
+
+def recommend(index: ProblemIndex, ids: np.ndarray, solved_set, rating: Optional[int],
+              n: int = DEFAULT_LIMIT) -> np.ndarray:
+    """The best ``n`` unsolved problems among ``ids`` for a handle."""
+    solved = index.solved_mask(solved_set)
+    ids = ids[~solved[ids]]
+    return top(score(index, solved, rating), ids, n)
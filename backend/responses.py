@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# backend/responses.py
+"""
+Conditional GET and compression helpers for JSON endpoints.
+
+A response is identified by a strong ETag derived from everything its body
+depends on (snapshot generation, the handle's solved-set version and the
+normalised query), so a matching If-None-Match can be answered with 304
+before any rows are built. Compressed bodies are kept in an LRU cache keyed
+by (ETag, encoding) and bounded by their total size, so repeated queries
+skip both row building and compression.
+"""
+
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+MIN_COMPRESS_BYTES = 512
+
+
+def make_etag(*parts) -> str:
+    """Unquoted strong ETag value for the given inputs."""
+    return hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()[:24]
+
+
+def choose_encoding(accept_encodings) -> str:
+    """Best encoding we support from a werkzeug Accept-Encoding header ("identity" if none)."""
+    if brotli is not None and accept_encodings["br"]:
+        return "br"
+    if accept_encodings["gzip"]:
+        return "gzip"
+    return "identity"
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=5)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=6)
+    return body
+
+
+class BodyCache:
+    """(etag, encoding) -> (encoded body, encoding used, extra headers), bounded by total body bytes."""
+
+    ENTRY_OVERHEAD = 200   # key, tuple and headers, roughly
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()   # key -> (entry, weight)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, etag: str, encoding: str):
+        key = (etag, encoding)
+        with self._lock:
+            found = self._data.get(key)
+            if found is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return found[0]
+
+    def encode_and_put(self, etag: str, encoding: str, body: bytes, headers: dict, personal: bool = False):
+        """
+        Compress ``body`` if worthwhile and cache it; return (body, encoding
+        actually used, headers). A ``personal`` body (one handle's view) is
+        rarely asked for again, so it is only kept when it saved a compression.
+        """
+        used = encoding if len(body) >= MIN_COMPRESS_BYTES else "identity"
+        entry = (compress(body, used), used, headers)
+        if personal and used == "identity":
+            return entry
+        key, w = (etag, encoding), len(entry[0]) + self.ENTRY_OVERHEAD
+        with self._lock:
+            if w <= self.max_bytes and key not in self._data:
+                self._data[key] = (entry, w)
+                self.bytes += w
+                while self.bytes > self.max_bytes:
+                    _, (_, old) = self._data.popitem(last=False)
+                    self.bytes -= old
+        return entry
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# backend/scheduler.py
+"""
+Rate-limit-aware scheduler for Codeforces API calls.
+
+Codeforces throttles clients that call more often than about once every two
+seconds, so every upstream call in every process on the machine takes a token
+from one token bucket whose state lives in a small lock-protected file
+(fcntl.flock). Within a process, calls wait in a priority queue (interactive
+handle lookups ahead of background refreshes) and identical calls that are
+already queued or running share one result. A caller can give up on a call
+(call(abandon=event)); a queued call nobody waits for any more is dropped
+before it takes a token.
+"""
+
+import heapq
+import itertools
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # not POSIX: fall back to a per-process bucket
+    fcntl = None
+
+INTERACTIVE = 0
+BACKGROUND = 1
+
+ABANDON_POLL = 0.05   # seconds between checks of a caller's abandon event
+
+
+class Abandoned(RuntimeError):
+    """The caller stopped waiting for the call (its request failed or went away)."""
+
+
+class RateLimiter:
+    """Token bucket shared by all processes that use the same state file."""
+
+    def __init__(self, path: str, rate: float, burst: float = 1.0):
+        self.path = path
+        self.rate = rate
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._state = (burst, time.time())  # used when fcntl is unavailable
+
+    def reserve(self, max_wait: Optional[float] = None) -> Optional[float]:
+        """
+        Take one token (possibly from the future); return how long to sleep
+        before using it. With ``max_wait``, a token further away than that is
+        not taken and None is returned instead.
+        """
+        with self._lock:
+            if fcntl is None:
+                state, wait = self._take(self._state)
+                if max_wait is not None and wait > max_wait:
+                    return None
+                self._state = state
+                return wait
+            with open(self.path, "a+") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    f.seek(0)
+                    try:
+                        tokens, updated = (float(x) for x in f.read().split())
+                    except ValueError:
+                        tokens, updated = self.burst, time.time()
+                    (tokens, updated), wait = self._take((tokens, updated))
+                    if max_wait is not None and wait > max_wait:
+                        return None
+                    f.seek(0)
+                    f.truncate()
+                    f.write(f"{tokens!r} {updated!r}")
+                    f.flush()
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+                return wait
+
+    def _take(self, state):
+        tokens, updated = state
+        now = time.time()
+        tokens = min(self.burst, tokens + max(now - updated, 0.0) * self.rate) - 1.0
+        return (tokens, now), max(-tokens / self.rate, 0.0)
+
+
+class Scheduler:
+    def __init__(self, limiter: RateLimiter, workers: int = 8):
+        self.limiter = limiter
+        self.workers = workers
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._pid = None
+        self._reset()
+
+    def _reset(self):
+        # (re)initialise per-process state; also runs in a forked worker on first use
+        self._pid = os.getpid()
+        self._heap = []
+        self._jobs = {}   # key -> [future, callers waiting for it]
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="cf-call")
+        self._thread = None
+        self.dispatched = 0
+        self.deduplicated = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def submit(self, key, fn, priority: int = INTERACTIVE) -> Future:
+        """Queue fn() under ``key``; a call with the same key that is still queued or running is reused."""
+        with self._cond:
+            if self._pid != os.getpid():
+                self._reset()
+            job = self._jobs.get(key)
+            if job is not None:
+                self.deduplicated += 1
+                job[1] += 1
+                return job[0]
+            fut = Future()
+            self._jobs[key] = [fut, 1]
+            heapq.heappush(self._heap, (priority, next(self._seq), time.monotonic(), key, fn, fut))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._dispatch, name="cf-scheduler", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return fut
+
+    def call(self, key, fn, priority: int = INTERACTIVE, abandon: Optional[threading.Event] = None):
+        """submit() and wait for the result; raises Abandoned once ``abandon`` is set."""
+        fut = self.submit(key, fn, priority)
+        if abandon is None:
+            return fut.result()
+        while not abandon.is_set():
+            try:
+                return fut.result(timeout=ABANDON_POLL)
+            except FutureTimeout:
+                pass
+        self._release(key, fut)
+        raise Abandoned(f"gave up waiting for {key!r}")
+
+    def _release(self, key, fut: Future):
+        """One caller of ``key`` stopped waiting; drop the call if it is still queued and was the last one."""
+        with self._cond:
+            job = self._jobs.get(key)
+            if job is None or job[0] is not fut:
+                return
+            job[1] -= 1
+            if job[1] == 0 and fut.cancel():
+                del self._jobs[key]
+                self._heap = [entry for entry in self._heap if entry[5] is not fut]
+                heapq.heapify(self._heap)
+
+    def stats(self) -> dict:
+        with self._cond:
+            queued = len(self._heap)
+            return {
+                "queued": queued,
+                "running": len(self._jobs) - queued,
+                "dispatched": self.dispatched,
+                "deduplicated": self.deduplicated,
+                "wait_avg_seconds": self.wait_total / self.dispatched if self.dispatched else 0.0,
+                "wait_max_seconds": self.wait_max,
+            }
+
+    def _dispatch(self):
+        while True:
+            with self._cond:
+                while not self._heap:
+                    self._cond.wait()
+            # take the token first so the highest-priority call queued by then gets it
+            wait = self.limiter.reserve()
+            if wait > 0:
+                time.sleep(wait)
+            with self._cond:
+                if not self._heap:
+                    continue   # every queued call was abandoned while we waited; the token goes unused
+                _, _, enqueued, key, fn, fut = heapq.heappop(self._heap)
+                fut.set_running_or_notify_cancel()   # from here on the call can no longer be cancelled
+                waited = time.monotonic() - enqueued
+                self.dispatched += 1
+                self.wait_total += waited
+                self.wait_max = max(self.wait_max, waited)
+            try:
+                self._executor.submit(self._execute, key, fn, fut)
+            except RuntimeError as e:
+                # the interpreter is exiting; fail every call so no thread waits for a result forever
+                self._fail_all(e, fut)
+                return
+
+    def _fail_all(self, error: BaseException, running: Future):
+        with self._cond:
+            running.set_exception(error)
+            for *_, fut in self._heap:
+                if fut.set_running_or_notify_cancel():
+                    fut.set_exception(error)
+            self._heap = []
+            self._jobs = {}
+            self._thread = None
+
+    def _execute(self, key, fn, fut: Future):
+        try:
+            fut.set_result(fn())
+        except BaseException as e:
+            fut.set_exception(e)
+        finally:
+            with self._cond:
+                self._jobs.pop(key, None)
+
+
+scheduler = Scheduler(RateLimiter(
+    os.environ.get("CF_RATE_STATE", os.path.join(tempfile.gettempdir(), "cf_ladder_rate")),
+    rate=float(os.environ.get("CF_RATE", 0.5)),     # calls per second, shared by every process
+    burst=float(os.environ.get("CF_RATE_BURST", 1)),
+))
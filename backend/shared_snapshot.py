@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# backend/shared_snapshot.py
+"""
+Memory-mapped problem index shared by all gunicorn workers.
+
+One worker at a time (elected with a lock file) fetches the problemset and
+publishes it as a flat file: fixed-width NumPy columns, the four sort
+permutations, and string tables for problem names, tags, index letters and
+contest names. Every worker maps the current file read-only and builds its
+ProblemIndex on top of the mapping, so N workers share one copy of the data.
+A refresh writes a new file and renames it over the old one; workers notice
+the new inode on their next request and switch to the new generation, while
+requests still holding the old mapping finish on it undisturbed.
+
+Layout: 8-byte magic, u32 version, u32 header length, JSON header
+({"generation", "digest", "arrays": {name: [offset, dtype, length]}}), then 8-byte
+aligned array data. Offsets are relative to the start of the data area.
+"""
+
+import contextlib
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from problem_index import ProblemIndex, SORT_KEYS
+
+try:
+    import fcntl
+except ImportError:  # not POSIX: only threads of one process are serialised
+    fcntl = None
+
+MAGIC = b"CFSHM\0\0\0"
+VERSION = 1
+_PREFIX = struct.Struct("<8sII")
+_ALIGN = 8
+
+
+def _align(n: int) -> int:
+    return (n + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def _string_table(strings: List[str]):
+    encoded = [s.encode("utf-8") for s in strings]
+    off = np.zeros(len(encoded) + 1, dtype=np.uint32)
+    np.cumsum([len(b) for b in encoded], out=off[1:])
+    return off, np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+
+class _Strings:
+    """Read-only sequence of strings stored as (offsets, utf-8 blob)."""
+    __slots__ = ("off", "blob")
+
+    def __init__(self, off: np.ndarray, blob: np.ndarray):
+        self.off = off
+        self.blob = blob
+
+    def __len__(self):
+        return len(self.off) - 1
+
+    def __getitem__(self, i: int) -> str:
+        return self.blob[self.off[i]:self.off[i + 1]].tobytes().decode("utf-8")
+
+
+class _TagLists:
+    """Read-only sequence of per-problem tag lists stored as (offsets, tag ids) into a tag vocabulary."""
+    __slots__ = ("off", "ids", "vocab")
+
+    def __init__(self, off: np.ndarray, ids: np.ndarray, vocab: List[str]):
+        self.off = off
+        self.ids = ids
+        self.vocab = vocab
+
+    def __len__(self):
+        return len(self.off) - 1
+
+    def __getitem__(self, i: int) -> Tuple[str, ...]:
+        vocab = self.vocab
+        return tuple(vocab[t] for t in self.ids[self.off[i]:self.off[i + 1]])
+
+
+def _arrays_for(index: ProblemIndex) -> Dict[str, np.ndarray]:
+    tag_lists = [index.tags[i] for i in range(index.size)]
+    tag_vocab = sorted({t for tags in tag_lists for t in tags})
+    tag_code = {t: i for i, t in enumerate(tag_vocab)}
+    tag_off = np.zeros(index.size + 1, dtype=np.uint32)
+    np.cumsum([len(t) for t in tag_lists], out=tag_off[1:])
+    tag_ids = np.fromiter((tag_code[t] for tags in tag_lists for t in tags), dtype=np.uint16, count=int(tag_off[-1]))
+    contest_ids = sorted(index.contest_map)
+
+    arrays = {
+        "contest_id": index.contest_id.astype(np.int32),
+        "index_code": index.index_code.astype(np.int16),
+        "rating": index.rating.astype(np.int32),
+        "division": index.division.astype(np.int8),
+        "solved_count": index.solved_count.astype(np.int64),
+        "tag_off": tag_off,
+        "tag_ids": tag_ids,
+        "contests": np.array(contest_ids, dtype=np.int32),
+    }
+    for key in SORT_KEYS:
+        arrays[f"order_{key}"] = index.orders[key].astype(np.int32)
+    for name, strings in (("names", [index.names[i] for i in range(index.size)]),
+                          ("index_vocab", index.index_vocab),
+                          ("tag_vocab", tag_vocab),
+                          ("contest_names", [index.contest_map[c] for c in contest_ids])):
+        arrays[f"{name}_off"], arrays[f"{name}_blob"] = _string_table(strings)
+    return arrays
+
+
+def write(path: str, index: ProblemIndex, generation: int):
+    """Write ``index`` to ``path`` atomically (temp file + rename)."""
+    arrays = _arrays_for(index)
+    layout, offset = {}, 0
+    for name, arr in arrays.items():
+        layout[name] = [offset, arr.dtype.str, len(arr)]
+        offset = _align(offset + arr.nbytes)
+    header = json.dumps({"generation": generation, "digest": index.digest(), "arrays": layout}).encode("utf-8")
+    data_start = _align(_PREFIX.size + len(header))
+
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(_PREFIX.pack(MAGIC, VERSION, len(header)))
+        f.write(header)
+        for name, arr in arrays.items():
+            f.seek(data_start + layout[name][0])
+            f.write(arr.tobytes())
+        f.truncate(data_start + offset)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def read(path: str):
+    """Map ``path`` and return (generation, ProblemIndex) backed by the mapping."""
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, version, header_len = _PREFIX.unpack_from(mm)
+    if magic != MAGIC or version != VERSION:
+        raise RuntimeError(f"{path} is not a version {VERSION} shared snapshot")
+    header = json.loads(mm[_PREFIX.size:_PREFIX.size + header_len])
+    data_start = _align(_PREFIX.size + header_len)
+    a = {name: np.frombuffer(mm, dtype=np.dtype(dt), count=n, offset=data_start + off)
+         for name, (off, dt, n) in header["arrays"].items()}
+
+    def strings(name):
+        return _Strings(a[f"{name}_off"], a[f"{name}_blob"])
+
+    def string_list(name):
+        table = strings(name)
+        return [table[i] for i in range(len(table))]
+
+    contest_names = string_list("contest_names")
+    index = ProblemIndex(
+        contest_id=a["contest_id"],
+        index_code=a["index_code"],
+        rating=a["rating"],
+        division=a["division"],
+        solved_count=a["solved_count"],
+        index_vocab=string_list("index_vocab"),
+        names=strings("names"),
+        tags=_TagLists(a["tag_off"], a["tag_ids"], string_list("tag_vocab")),
+        contest_map={int(c): contest_names[i] for i, c in enumerate(a["contests"])},
+        orders={key: a[f"order_{key}"] for key in SORT_KEYS},
+    )
+    index.generation = header.get("digest") or index.digest()   # files from before the digest was stored
+    return header["generation"], index
+
+
+class MappedSnapshot:
+    def __init__(self, path: str):
+        self.path = path
+        self.generation = 0
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._ident = None
+        self._index = None
+
+    def age(self) -> Optional[float]:
+        """Seconds since the file was last published, or None if there is none yet."""
+        try:
+            return time.time() - os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            return None
+
+    def index(self) -> Optional[ProblemIndex]:
+        """Index over the newest published generation (remapped only when the file was replaced)."""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return self._index
+        ident = (st.st_ino, st.st_mtime_ns)
+        with self._lock:
+            if ident != self._ident:
+                self.generation, self._index = read(self.path)
+                self._ident = ident
+            return self._index
+
+    def publish(self, index: ProblemIndex):
+        """Write a new generation; call while holding writer_lock()."""
+        current = self.index()
+        write(self.path, index, self.generation + 1 if current is not None else 1)
+
+    @contextlib.contextmanager
+    def writer_lock(self):
+        """Held by the one worker that refreshes the file; others block and then see its result."""
+        with self._write_lock:
+            if fcntl is None:
+                yield
+                return
+            with open(self.path + ".lock", "a") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# backend/snapshot.py
+"""
+On-disk snapshot of the Codeforces contest list and problemset.
+
+The file is a small header (magic + format version) followed by named
+sections, e.g. "contests" and "problemset", each stored as its own gzip
+compressed JSON document together with the time it was saved, so callers can
+tell how stale it is and a save only compresses the section it replaces (the
+others are copied over as they are). Writes go to a temp file that is renamed
+over the old one, so readers never see a half-written snapshot, and hold an
+exclusive flock on ``<path>.lock`` so writers in other processes cannot drop
+each other's sections.
+"""
+
+import contextlib
+import gzip
+import json
+import logging
+import os
+import struct
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # not POSIX: only threads of one process are serialised
+    fcntl = None
+
+log = logging.getLogger(__name__)
+
+MAGIC = b"CFSNAP"
+VERSION = 2
+_HEADER = struct.Struct(">6sH")
+# per section: name length, saved_at, compressed length; then the name and the gzip member
+_SECTION = struct.Struct(">HdI")
+
+DEFAULT_PATH = os.environ.get(
+    "CF_SNAPSHOT", os.path.join(os.path.dirname(os.path.abspath(__file__)), "cf_snapshot.bin"))
+
+_write_lock = threading.Lock()
+
+
+def _read(path: str) -> Dict[str, Tuple[float, bytes]]:
+    """name -> (saved_at, compressed data), without decompressing anything; {} if unusable."""
+    try:
+        with open(path, "rb") as f:
+            raw = f.read()
+    except FileNotFoundError:
+        return {}
+    if len(raw) < _HEADER.size:
+        return {}
+    magic, version = _HEADER.unpack_from(raw)
+    if magic == MAGIC and version == 1:
+        # the older layout: one gzip member holding every section
+        try:
+            sections = json.loads(gzip.decompress(raw[_HEADER.size:]))
+        except (OSError, EOFError, ValueError) as e:
+            log.warning("ignoring unreadable snapshot %s: %s", path, e)
+            return {}
+        return {name: (section["saved_at"], _compress(section["data"])) for name, section in sections.items()}
+    if magic != MAGIC or version != VERSION:
+        log.warning("ignoring snapshot %s (magic=%r version=%s)", path, magic, version)
+        return {}
+    sections, offset = {}, _HEADER.size
+    try:
+        while offset < len(raw):
+            name_len, saved_at, size = _SECTION.unpack_from(raw, offset)
+            offset += _SECTION.size
+            name = raw[offset:offset + name_len].decode("utf-8")
+            body = raw[offset + name_len:offset + name_len + size]
+            offset += name_len + size
+            if len(body) != size:
+                raise ValueError("truncated section")
+            sections[name] = (saved_at, body)
+    except (struct.error, ValueError) as e:
+        log.warning("ignoring unreadable snapshot %s: %s", path, e)
+        return {}
+    return sections
+
+
+def _compress(data: Any) -> bytes:
+    return gzip.compress(json.dumps(data, separators=(",", ":")).encode("utf-8"), compresslevel=6)
+
+
+def _decompress(path: str, name: str, body: bytes):
+    try:
+        return json.loads(gzip.decompress(body))
+    except (OSError, EOFError, ValueError) as e:
+        log.warning("ignoring unreadable section %s of snapshot %s: %s", name, path, e)
+        return None
+
+
+def load(path: str) -> Dict[str, dict]:
+    """Return all sections in the snapshot, or {} if it is missing, corrupt or from another version."""
+    sections = {}
+    for name, (saved_at, body) in _read(path).items():
+        data = _decompress(path, name, body)
+        if data is not None:
+            sections[name] = {"saved_at": saved_at, "data": data}
+    return sections
+
+
+def load_section(path: str, name: str) -> Tuple[Optional[Any], Optional[float]]:
+    """Return (data, saved_at) for one section, or (None, None) if it is not stored."""
+    saved_at, body = _read(path).get(name, (None, None))
+    data = None if body is None else _decompress(path, name, body)
+    if data is None:
+        return None, None
+    return data, saved_at
+
+
+@contextlib.contextmanager
+def _locked(path: str):
+    """Serialise writers of ``path`` across threads and processes."""
+    with _write_lock:
+        if fcntl is None:
+            yield
+            return
+        with open(path + ".lock", "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def save_section(path: str, name: str, data: Any):
+    """Replace one section, keeping the others, with an atomic rename."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    body = _compress(data)
+    # the read-merge-write must be one step, or a concurrent writer's section is lost
+    with _locked(path):
+        sections = _read(path)
+        sections[name] = (time.time(), body)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(_HEADER.pack(MAGIC, VERSION))
+                for section, (saved_at, compressed) in sections.items():
+                    encoded = section.encode("utf-8")
+                    f.write(_SECTION.pack(len(encoded), saved_at, len(compressed)))
+                    f.write(encoded)
+                    f.write(compressed)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.remove(tmp)
+            raise
+
+
+def store(path: str, name: str, data: Any) -> bool:
+    """save_section() for callers that already hold the data: a failed write is logged, not raised."""
+    try:
+        save_section(path, name, data)
+    except OSError as e:
+        log.warning("could not write section %s of snapshot %s: %s", name, path, e)
+        return False
+    return True
+
+
+def fetch_through(path: str, name: str, download: Callable[[], Any], offline: bool = False):
+    """
+    Return download() and store it under ``name``. If offline, or if the
+    upstream call fails, return the stored copy instead.
+    """
+    if offline:
+        data, _ = load_section(path, name)
+        if data is None:
+            raise RuntimeError(f"No '{name}' data in snapshot {path}; run once without --offline first")
+        return data
+    try:
+        data = download()
+    except Exception as e:
+        stored, saved_at = load_section(path, name)
+        if stored is None:
+            raise
+        log.warning("upstream fetch of %s failed (%s); using snapshot from %s",
+                    name, e, time.strftime("%Y-%m-%d %H:%M", time.localtime(saved_at)))
+        return stored
+    store(path, name, data)
+    return data
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# backend/submissions.py
+"""
+Per-handle solved-set cache with incremental user.status sync.
+
+The first lookup for a handle downloads its whole submission history. Later
+lookups only page through the newest submissions (user.status returns them
+newest first) until they reach one that was already seen, so a repeat lookup
+usually costs a single small request. Requests for a handle that arrive while
+its sync is running wait for that sync and share its result, and a handle
+synced less than ``fresh_for`` seconds ago is answered without calling
+Codeforces at all. AsyncSolvedSets does the same for the asyncio serving
+mode, with a coroutine fetch_page and per-handle asyncio locks.
+"""
+
+import asyncio
+import hashlib
+import threading
+import time
+from typing import Awaitable, Callable, List, Optional, Set, Tuple
+
+from cache import LRUCache
+
+# fetch_page(handle, start, count) -> submissions, newest first; start/count None means full history
+FetchPage = Callable[[str, Optional[int], Optional[int]], List[dict]]
+AsyncFetchPage = Callable[[str, Optional[int], Optional[int]], Awaitable[List[dict]]]
+
+# verdict is missing or "TESTING" while a submission is still being judged
+_PENDING = (None, "TESTING")
+
+
+def _key_digest(key: Tuple[int, str]) -> int:
+    return int.from_bytes(hashlib.blake2b(f"{key[0]}/{key[1]}".encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def _version(solved: Set[Tuple[int, str]], digest: int) -> str:
+    return f"{len(solved)}.{digest:x}"
+
+
+EMPTY_VERSION = _version(set(), 0)
+
+
+class _HandleState:
+    __slots__ = ("lock", "solved", "digest", "version", "watermark", "synced", "synced_at")
+
+    def __init__(self, lock=None):
+        self.lock = lock or threading.Lock()
+        self.solved: Set[Tuple[int, str]] = set()
+        self.digest = 0       # XOR of the members' hashes, so it can be updated with just the additions
+        self.version = EMPTY_VERSION   # from the set's content: the same set has the same version in any process
+        self.watermark = 0    # every submission with id <= watermark has a final verdict and was applied
+        self.synced = False
+        self.synced_at = 0.0  # time.monotonic() when the last sync finished
+
+    def current(self, arrived: float, fresh_for: float) -> bool:
+        """True if a sync finished after ``arrived`` (the caller waited for it) or within ``fresh_for`` seconds."""
+        return self.synced and (self.synced_at >= arrived or time.monotonic() - self.synced_at < fresh_for)
+
+
+class SolvedSets:
+    def __init__(self, fetch_page: FetchPage, maxsize: int = 1024, page_size: int = 100, fresh_for: float = 5.0):
+        self.fetch_page = fetch_page
+        self.page_size = page_size
+        self.fresh_for = fresh_for
+        self._states = LRUCache(maxsize)
+
+    @property
+    def hits(self) -> int:
+        return self._states.hits
+
+    @property
+    def misses(self) -> int:
+        return self._states.misses
+
+    def get(self, handle: str) -> Set[Tuple[int, str]]:
+        """Return the (contestId, index) pairs solved by ``handle``. Treat the result as read-only."""
+        return self.get_versioned(handle)[0]
+
+    def get_versioned(self, handle: str) -> Tuple[Set[Tuple[int, str]], str]:
+        """Like get(), plus a version that changes whenever the solved set does."""
+        if not handle:
+            return set(), EMPTY_VERSION
+        arrived = time.monotonic()
+        state = self._states.setdefault(handle.lower(), _HandleState)
+        with state.lock:
+            if state.current(arrived, self.fresh_for):
+                return state.solved, state.version
+            if state.synced:
+                subs = self._fetch_since(handle, state.watermark)
+            else:
+                subs = self.fetch_page(handle, None, None)
+            self._apply(state, subs)
+            return state.solved, state.version
+
+    def _fetch_since(self, handle: str, watermark: int) -> List[dict]:
+        new, start = [], 1
+        while True:
+            page = self.fetch_page(handle, start, self.page_size)
+            for sub in page:
+                if sub["id"] <= watermark:
+                    return new
+                new.append(sub)
+            if len(page) < self.page_size:
+                return new
+            start += self.page_size
+
+    @staticmethod
+    def _apply(state: _HandleState, subs: List[dict]):
+        added = set()
+        top = state.watermark
+        oldest_pending = None
+        for sub in subs:
+            sid = sub["id"]
+            top = max(top, sid)
+            verdict = sub.get("verdict")
+            if verdict in _PENDING:
+                oldest_pending = sid if oldest_pending is None else min(oldest_pending, sid)
+            elif verdict == "OK":
+                pid = sub.get("problem", {})
+                key = (pid.get("contestId"), pid.get("index"))
+                if key not in state.solved:
+                    added.add(key)
+        if added:
+            # copy-on-write so sets already handed to callers never change under them
+            state.solved = state.solved | added
+            for key in added:
+                state.digest ^= _key_digest(key)
+            state.version = _version(state.solved, state.digest)
+        state.watermark = top if oldest_pending is None else oldest_pending - 1
+        state.synced = True
+        state.synced_at = time.monotonic()
+
+
+class AsyncSolvedSets(SolvedSets):
+    """SolvedSets with an AsyncFetchPage; a cancelled sync leaves the handle's state untouched."""
+
+    async def get(self, handle: str) -> Set[Tuple[int, str]]:
+        return (await self.get_versioned(handle))[0]
+
+    async def get_versioned(self, handle: str) -> Tuple[Set[Tuple[int, str]], str]:
+        if not handle:
+            return set(), EMPTY_VERSION
+        arrived = time.monotonic()
+        state = self._states.setdefault(handle.lower(), lambda: _HandleState(asyncio.Lock()))
+        async with state.lock:
+            if state.current(arrived, self.fresh_for):
+                return state.solved, state.version
+            if state.synced:
+                subs = await self._fetch_since(handle, state.watermark)
+            else:
+                subs = await self.fetch_page(handle, None, None)
+            self._apply(state, subs)
+            return state.solved, state.version
+
+    async def _fetch_since(self, handle: str, watermark: int) -> List[dict]:
+        new, start = [], 1
+        while True:
+            page = await self.fetch_page(handle, start, self.page_size)
+            for sub in page:
+                if sub["id"] <= watermark:
+                    return new
+                new.append(sub)
+            if len(page) < self.page_size:
+                return new
+            start += self.page_size
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# backend/upstream.py
+"""
+Shared HTTP plumbing for Codeforces API calls.
+
+All calls go through one pooled keep-alive Session with per-call timeouts and
+bounded retries (exponential backoff on connection errors, 429 and 5xx).
+Every attempt, retries included, is queued through scheduler.scheduler and
+takes a token, which keeps all processes under the Codeforces rate limit. parallel() runs independent calls
+concurrently so a request waits for the slowest call instead of the sum of
+all of them.
+
+AsyncUpstream is the non-blocking counterpart used by the asyncio serving
+mode (asgi.py): the same timeouts, retries and shared token bucket, on an
+httpx.AsyncClient. A call that could not get a rate-limit token before the
+current request's deadline (see ``deadline``) fails at once with Overloaded
+instead of queueing for a token it would never use.
+"""
+
+import asyncio
+import contextvars
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+from scheduler import BACKGROUND, INTERACTIVE, Abandoned, scheduler
+
+try:
+    import httpx
+except ImportError:  # only the asyncio serving mode needs it
+    httpx = None
+
+# (connect, read) seconds; read is per socket read, not for the whole body
+TIMEOUT = (float(os.environ.get("CF_CONNECT_TIMEOUT", 5)), float(os.environ.get("CF_READ_TIMEOUT", 30)))
+RETRIES = int(os.environ.get("CF_RETRIES", 2))
+POOL_SIZE = int(os.environ.get("CF_POOL_SIZE", 16))
+# connections are cheap for the event loop; Codeforces' rate limit is the real bound
+ASYNC_POOL_SIZE = int(os.environ.get("CF_ASYNC_POOL_SIZE", 100))
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def _make_session() -> requests.Session:
+    # no retries in urllib3: they would bypass the rate limiter, so get() retries through the scheduler instead
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_SIZE, max_retries=0)
+    s = requests.Session()
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
+    return s
+
+
+session = _make_session()
+_executor = ThreadPoolExecutor(max_workers=POOL_SIZE, thread_name_prefix="cf-upstream")
+
+# set by a caller that may give up on its calls (see Scheduler.call); None: wait for every call
+abandon: contextvars.ContextVar = contextvars.ContextVar("upstream_abandon", default=None)
+
+
+def _backoff(attempt: int, retry_after: Optional[str]) -> float:
+    """Seconds to wait after failed ``attempt``: the server's Retry-After if it sent one, else 0.5s, 1s, 2s, ..."""
+    return float(retry_after) if retry_after and retry_after.isdigit() else 0.5 * 2 ** attempt
+
+
+def get(url: str, params=None, timeout=TIMEOUT, priority: int = INTERACTIVE) -> requests.Response:
+    """Rate-limited GET; identical concurrent calls share one upstream request."""
+    key = (url, tuple(sorted((params or {}).items())))
+    method = url.rsplit("/", 1)[-1]
+    for attempt in range(RETRIES + 1):
+        # each attempt is its own scheduled call, so a retry waits for a token like any other request
+        try:
+            r = scheduler.call(key, lambda: session.get(url, params=params, timeout=timeout), priority,
+                               abandon.get())
+        except Abandoned:
+            metrics.UPSTREAM_CALLS.inc(method, "abandoned")
+            raise
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == RETRIES:
+                metrics.UPSTREAM_CALLS.inc(method, "exception")
+                raise
+            retry_after = None
+        except Exception:
+            metrics.UPSTREAM_CALLS.inc(method, "exception")
+            raise
+        else:
+            if r.status_code not in RETRY_STATUSES or attempt == RETRIES:
+                metrics.UPSTREAM_CALLS.inc(method, "ok" if r.ok else "http_error")
+                return r
+            retry_after = r.headers.get("Retry-After")
+        time.sleep(_backoff(attempt, retry_after))
+
+
+def parallel(*calls):
+    """Run zero-argument callables concurrently; return their results in order, re-raising the first error."""
+    if len(calls) <= 1:
+        return [c() for c in calls]
+    # run each call in a copy of the caller's context so stage timings land in the caller's collector
+    futures = [_executor.submit(contextvars.copy_context().run, c) for c in calls]
+    return [f.result() for f in futures]
+
+
+# ---------------------- asyncio ----------------------
+
+# event-loop time by which the current request must be answered (None: no deadline)
+deadline: contextvars.ContextVar = contextvars.ContextVar("upstream_deadline", default=None)
+
+
+class Overloaded(RuntimeError):
+    """No rate-limit token is available before the request's deadline."""
+
+
+def _remaining() -> Optional[float]:
+    until = deadline.get()
+    return None if until is None else max(until - asyncio.get_running_loop().time(), 0.0)
+
+
+class AsyncUpstream:
+    """
+    Non-blocking rate-limited GET for one event loop. Identical concurrent
+    calls share one upstream request, which is cancelled once nobody is
+    waiting for it any more.
+    """
+
+    def __init__(self):
+        self._client = None
+        self._flights = {}   # key -> [task, waiters]
+
+    @property
+    def client(self) -> "httpx.AsyncClient":
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(TIMEOUT[1], connect=TIMEOUT[0]),
+                limits=httpx.Limits(max_connections=ASYNC_POOL_SIZE, max_keepalive_connections=ASYNC_POOL_SIZE))
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def get(self, url: str, params=None) -> "httpx.Response":
+        key = (url, tuple(sorted((params or {}).items())))
+        flight = self._flights.get(key)
+        if flight is None:
+            task = asyncio.ensure_future(self._call(url, params))
+            flight = self._flights[key] = [task, 0]
+            task.add_done_callback(lambda _: self._land(key, flight))
+        flight[1] += 1
+        try:
+            # shielded: one waiter giving up must not cancel the call for the others
+            return await asyncio.shield(flight[0])
+        finally:
+            flight[1] -= 1
+            if not flight[1]:
+                flight[0].cancel()
+                self._land(key, flight)
+
+    def _land(self, key, flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    async def _call(self, url: str, params) -> "httpx.Response":
+        method = url.rsplit("/", 1)[-1]
+        for attempt in range(RETRIES + 1):
+            # every attempt takes a token: retries are separate calls to Codeforces. The bucket is a
+            # flock'd file shared with the other workers, so it is taken on a thread, not on the loop
+            wait = await asyncio.to_thread(scheduler.limiter.reserve, max_wait=_remaining())
+            if wait is None:
+                metrics.UPSTREAM_CALLS.inc(method, "overloaded")
+                raise Overloaded(f"Codeforces API rate limit: no call slot for {method} before the deadline")
+            await asyncio.sleep(wait)
+            try:
+                r = await self.client.get(url, params=params)
+            except httpx.TransportError:
+                if attempt == RETRIES:
+                    metrics.UPSTREAM_CALLS.inc(method, "exception")
+                    raise
+                retry_after = None
+            else:
+                if r.status_code not in RETRY_STATUSES or attempt == RETRIES:
+                    metrics.UPSTREAM_CALLS.inc(method, "ok" if r.is_success else "http_error")
+                    return r
+                retry_after = r.headers.get("Retry-After")
+            await asyncio.sleep(_backoff(attempt, retry_after))
+
+
+async_upstream = AsyncUpstream()
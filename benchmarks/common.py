@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# benchmarks/common.py
+"""
+Helpers shared by the benchmark scripts: backend import path, percentiles,
+and stored baselines.
+
+A baseline is a JSON file {name: {metric: value}} kept under
+benchmarks/baselines/, together with the time of a fixed reference workload
+(reference_seconds()) measured in the same run. compare() measures that
+workload again and scales the baseline timings by how much faster or slower
+this host is, so the gate is on each case's cost relative to the reference
+rather than on raw timings from whichever machine saved the baseline. It
+prints every metric next to its scaled baseline with the relative change, so
+a regression shows up both in the report and in the diff of the baseline
+file when it is re-saved.
+"""
+
+import json
+import os
+import platform
+import random
+import sys
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINES = os.path.join(ROOT, "benchmarks", "baselines")
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+
+Results = Dict[str, Dict[str, float]]
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list (q in 0..100)."""
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, int(round(q / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[k]
+
+
+def reference_seconds(repeat: int = 5) -> float:
+    """Best time of a fixed mix of NumPy and pure-Python work, the yardstick for every timing."""
+    rnd = random.Random(0)
+    floats = np.random.default_rng(0).random(200_000)
+    words = [f"{rnd.random():.12f}" for _ in range(50_000)]
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        np.argsort(floats, kind="stable")
+        json.dumps(sorted(words, reverse=True))
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def _timing(metric: str) -> bool:
+    return metric.endswith(("seconds", "_ms", "_per_s"))
+
+
+def save(path: str, results: Results, reference: float):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    doc = {"machine": f"{platform.machine()} {platform.python_implementation()} {platform.python_version()}",
+           "reference_seconds": reference, "results": results}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(doc, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def compare(path: str, results: Results, reference: Optional[float] = None, tolerance: float = 0.2) -> bool:
+    """
+    Print results against the baseline at ``path``; False if a metric got
+    worse by more than ``tolerance`` once timings are scaled by ``reference``
+    (this run's reference_seconds()) over the baseline's.
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            doc = json.load(f)
+    except FileNotFoundError:
+        doc = {}
+    base = doc.get("results", {})
+    # > 1 when this host is slower than the one that saved the baseline
+    speed = reference / doc["reference_seconds"] if reference and doc.get("reference_seconds") else 1.0
+    print(f"  reference workload: {speed:.2f}x the baseline host's time")
+    ok = True
+    width = max((len(n) for n in results), default=10)
+    for name, metrics in results.items():
+        for metric, value in metrics.items():
+            old = base.get(name, {}).get(metric)
+            if old is None or old == 0:
+                print(f"  {name:<{width}}  {metric:<12} {value:12.6g}")
+                continue
+            if _timing(metric):
+                old = old / speed if metric.endswith("_per_s") else old * speed
+            change = value / old - 1
+            # throughput-like metrics get better as they grow, everything else as it shrinks
+            worse = -change if metric.endswith("_per_s") else change
+            flag = "  REGRESSION" if worse > tolerance else ""
+            ok &= not flag
+            print(f"  {name:<{width}}  {metric:<12} {value:12.6g}  (scaled baseline {old:.6g}, {change:+.1%}){flag}")
+    return ok
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# benchmarks/fixtures.py
+"""
+Codeforces API fixtures for the benchmarks and the stub server.
+
+A fixture file is gzip-compressed JSON holding the ``result`` of
+contest.list and problemset.problems, plus user.status and user.info per
+handle. Either
+record the live API once:
+
+  python benchmarks/fixtures.py record fixtures.json.gz --handles tourist Petr
+
+or generate a deterministic synthetic set, where --scale 1 is roughly the
+real problemset (about 10k problems in 2k contests):
+
+  python benchmarks/fixtures.py synthetic fixtures.json.gz --scale 10
+"""
+
+import argparse
+import gzip
+import json
+import random
+from typing import Dict, List
+
+CONTEST_KINDS = (
+    "Codeforces Round #{} (Div. 2)", "Codeforces Round #{} (Div. 1)", "Codeforces Round {} (Div. 3)",
+    "Codeforces Round {} (Div. 4)", "Codeforces Round {} (Div. 1 + Div. 2)", "Codeforces Global Round {}",
+    "Educational Codeforces Round {} (Rated for Div. 2)", "Good Bye {}", "Kotlin Heroes: Episode {}",
+)
+TAGS = ("dp", "greedy", "math", "graphs", "implementation", "strings", "trees", "binary search", "brute force",
+        "constructive algorithms", "number theory", "sortings", "data structures", "dfs and similar", "geometry")
+INDICES = ("A", "B", "C", "D", "E", "F", "G", "H", "B1", "B2", "C1", "C2", "E1", "E2")
+HANDLES = ("alice", "bob", "carol", "dave", "erin")
+
+
+def synthetic(scale: float = 1.0, seed: int = 1, handles=HANDLES, submissions_per_handle: int = 2000) -> dict:
+    rnd = random.Random(seed)
+    contests, problems, stats = [], [], []
+    for cid in range(1, int(2000 * scale) + 1):
+        contests.append({"id": cid, "name": rnd.choice(CONTEST_KINDS).format(cid), "phase": "FINISHED"})
+        for idx in sorted(rnd.sample(INDICES, rnd.randint(4, 7))):
+            p = {"contestId": cid, "index": idx, "name": f"Problem {cid}{idx}", "type": "PROGRAMMING",
+                 "tags": rnd.sample(TAGS, rnd.randint(0, 4))}
+            if rnd.random() < 0.95:
+                p["rating"] = rnd.randrange(800, 3600, 100)
+            problems.append(p)
+            stats.append({"contestId": cid, "index": idx, "solvedCount": int(rnd.paretovariate(1.2) * 500)})
+    problems.sort(key=lambda p: (-p["contestId"], p["index"]))
+    contests.reverse()
+    status = {}
+    for h in handles:
+        subs = []
+        for sid in range(submissions_per_handle, 0, -1):
+            p = rnd.choice(problems)
+            subs.append({"id": sid, "contestId": p["contestId"], "verdict": rnd.choice(("OK", "OK", "WRONG_ANSWER")),
+                         "problem": {"contestId": p["contestId"], "index": p["index"]}})
+        status[h] = subs
+    # own random stream, so the problems and submissions do not depend on the profiles
+    prnd = random.Random(seed + 1)
+    info = {h: {"handle": h, "rating": prnd.randrange(800, 2800)} if prnd.random() < 0.8 else {"handle": h}
+            for h in handles}
+    return {"contest.list": contests,
+            "problemset.problems": {"problems": problems, "problemStatistics": stats},
+            "user.status": status,
+            "user.info": info}
+
+
+def record(handles: List[str]) -> dict:
+    import requests
+    base = "https://codeforces.com/api"
+
+    def result(method, **params):
+        r = requests.get(f"{base}/{method}", params=params, timeout=60)
+        r.raise_for_status()
+        return r.json()["result"]
+
+    return {"contest.list": result("contest.list", gym="false"),
+            "problemset.problems": result("problemset.problems"),
+            "user.status": {h: result("user.status", handle=h) for h in handles},
+            "user.info": {h: result("user.info", handles=h)[0] for h in handles}}
+
+
+def save(path: str, fixtures: dict):
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        json.dump(fixtures, f)
+
+
+def load(path: str) -> dict:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def sizes(fixtures: dict) -> Dict[str, int]:
+    return {"contests": len(fixtures["contest.list"]),
+            "problems": len(fixtures["problemset.problems"]["problems"]),
+            "handles": len(fixtures["user.status"])}
+
+
+def main():
+    p = argparse.ArgumentParser(description="Create Codeforces API fixtures for benchmarks.")
+    sub = p.add_subparsers(dest="mode", required=True)
+    rec = sub.add_parser("record", help="Download live API responses")
+    rec.add_argument("path")
+    rec.add_argument("--handles", nargs="*", default=[])
+    syn = sub.add_parser("synthetic", help="Generate deterministic synthetic data")
+    syn.add_argument("path")
+    syn.add_argument("--scale", type=float, default=1.0)
+    syn.add_argument("--seed", type=int, default=1)
+    args = p.parse_args()
+    fixtures = record(args.handles) if args.mode == "record" else synthetic(args.scale, args.seed)
+    save(args.path, fixtures)
+    print(f"Wrote {args.path}: {sizes(fixtures)}")
+
+
+if __name__ == "__main__":
+    main()
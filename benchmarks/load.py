@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# benchmarks/load.py
+"""
+Concurrent load generator for /api/ladder.
+
+By default it is self-contained: it starts the stub Codeforces API and the
+Flask app (threaded werkzeug server) in this process, pointed at each other,
+then drives a mix of ladder queries from --concurrency client threads and
+reports latency percentiles and throughput. --url aims it at a running
+server instead (e.g. gunicorn), in which case the stub is not started.
+
+  python benchmarks/load.py --requests 2000 --concurrency 16
+  python benchmarks/load.py --url http://127.0.0.1:5000 --duration 30
+  python benchmarks/load.py --save
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+import common
+from fixtures import HANDLES, synthetic
+
+BASELINE = os.path.join(common.BASELINES, "load.json")
+
+QUERIES = (
+    "/api/ladder?min=800&max=1400",
+    "/api/ladder?min=800&max=3500&sort=rating&limit=25",
+    "/api/ladder?indices=A,B&sort=newest&limit=25&offset=50",
+    "/api/ladder?min=1200&max=2000&tags=dp,greedy&limit=25",
+    "/api/ladder?handle={handle}&min=800&max=2000&limit=25",
+    "/api/ladder?handle={handle}&indices=C,D&fields=name,link,solved",
+    "/api/ladder?handle={handle}&sort=recommended&limit=20",
+)
+
+
+def self_hosted(scale: float, latency: float) -> str:
+    """Start the stub API and the app in this process; returns the app's base URL."""
+    import stub_server
+    _, api_base = stub_server.start(synthetic(scale), latency=latency)
+    tmp = tempfile.mkdtemp(prefix="cf-load-")
+    os.environ.update({
+        "CF_API_BASE": api_base,
+        "CF_SNAPSHOT": os.path.join(tmp, "snapshot.bin"),
+        "CF_RATE_STATE": os.path.join(tmp, "rate"),
+        "CF_RATE": "1000",          # the stub does not throttle; measure the app, not the limiter
+        "CF_RATE_BURST": "1000",
+    })
+    import logging
+    from werkzeug.serving import make_server
+    import app
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)   # no access log per request
+    server = make_server("127.0.0.1", 0, app.app, threaded=True)
+    threading.Thread(target=server.serve_forever, name="cf-app", daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}"
+
+
+def run(base: str, concurrency: int, total: int, duration: float, seed: int = 1):
+    """Returns (latencies in seconds, errors, wall time)."""
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    issued = iter(range(total)) if total else None
+    deadline = time.monotonic() + duration if duration else None
+
+    def worker(n):
+        rnd = random.Random(seed + n)
+        session = requests.Session()
+        while True:
+            if deadline is not None and time.monotonic() >= deadline:
+                return
+            if issued is not None and next(issued, None) is None:
+                return
+            url = base + rnd.choice(QUERIES).format(handle=rnd.choice(HANDLES))
+            t0 = time.perf_counter()
+            try:
+                ok = session.get(url, timeout=60).ok
+            except requests.RequestException:
+                ok = False
+            dt = time.perf_counter() - t0
+            with lock:
+                latencies.append(dt)
+                errors[0] += not ok
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(concurrency)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latencies, errors[0], time.perf_counter() - t0
+
+
+def main():
+    p = argparse.ArgumentParser(description="Load test /api/ladder.")
+    p.add_argument("--url", help="Base URL of a running server (default: start stub + app in-process)")
+    p.add_argument("--scale", type=float, default=1.0, help="Synthetic data size for the in-process stub")
+    p.add_argument("--upstream-latency", type=float, default=0.0, help="Seconds the stub adds per API call")
+    p.add_argument("--concurrency", type=int, default=8)
+    p.add_argument("--requests", type=int, default=1000, help="Total requests (0: run for --duration)")
+    p.add_argument("--duration", type=float, default=0.0, help="Seconds to run when --requests is 0")
+    p.add_argument("--warmup", type=int, default=50, help="Untimed requests first (fills caches)")
+    p.add_argument("--baseline", default=BASELINE)
+    p.add_argument("--save", action="store_true", help="Overwrite the baseline with these results")
+    args = p.parse_args()
+
+    reference = common.reference_seconds()   # before the server threads start competing for the CPU
+    base = args.url or self_hosted(args.scale, args.upstream_latency)
+    run(base, min(args.concurrency, max(args.warmup, 1)), args.warmup, 0)
+    latencies, errors, wall = run(base, args.concurrency, args.requests, args.duration)
+    latencies.sort()
+    result = {
+        "p50_ms": common.percentile(latencies, 50) * 1000,
+        "p90_ms": common.percentile(latencies, 90) * 1000,
+        "p99_ms": common.percentile(latencies, 99) * 1000,
+        "requests_per_s": len(latencies) / wall if wall else 0.0,
+        "errors": errors,
+    }
+    results = {f"ladder_mix@c{args.concurrency}": result}
+    print(f"{len(latencies)} requests in {wall:.2f}s from {args.concurrency} clients, {errors} errors")
+    if args.save:
+        common.save(args.baseline, results, reference)
+        print(f"Saved results to {args.baseline}")
+        return
+    sys.exit(0 if common.compare(args.baseline, results, reference) and not errors else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# benchmarks/micro.py
+"""
+Micro-benchmarks for the ladder hot paths, on synthetic fixtures at several
+scales (1 = about the real problemset, 10 = ten times that). Each case is run
+--repeat times and its best time is reported; the comparison with the
+baseline is relative to common.reference_seconds(), measured in the same run.
+
+  python benchmarks/micro.py                      # compare with the stored baseline
+  python benchmarks/micro.py --save               # record a new baseline
+  python benchmarks/micro.py --scales 1 --only filter
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import common  # noqa: F401  (puts backend/ on sys.path)
+from fixtures import synthetic
+
+# importing app must not touch the network or a real snapshot
+os.environ.setdefault("CF_SNAPSHOT", os.path.join(tempfile.mkdtemp(prefix="cf-bench-"), "snapshot.bin"))
+os.environ.setdefault("CF_API_BASE", "http://127.0.0.1:9/api")
+
+import app  # noqa: E402
+import cf_division_ladder as cli  # noqa: E402
+import codeforces  # noqa: E402
+import recommend  # noqa: E402
+from problem_index import ProblemIndex  # noqa: E402
+
+BASELINE = os.path.join(common.BASELINES, "micro.json")
+
+
+def best_of(repeat: int, fn, *args):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def cases(fx: dict, outdir: str):
+    """(name, fn) pairs; every fn is self-contained and repeatable."""
+    contests_body = json.dumps({"status": "OK", "result": fx["contest.list"]})
+    problems_body = json.dumps({"status": "OK", "result": fx["problemset.problems"]})
+    contests = [[c["id"], c["name"]] for c in fx["contest.list"]]
+    contest_map = codeforces.contest_map_from(contests)
+    problems, solved_map = codeforces.problemset_from(fx["problemset.problems"])
+    index = ProblemIndex.from_problems(problems, solved_map, contest_map)
+    index.generation = f"bench-{len(problems)}"   # per scale: app caches are keyed on it
+    solved = codeforces.solved_from(next(iter(fx["user.status"].values())))
+    wide = cli.select_ids(index, [], ["A", "B", "C", "D", "E", "F"], None, 800, 3500)
+
+    def ladder_body():
+        app.ladder_cache.clear()
+        ids = app.select_problems(index, 800, 3500, [], "solved")
+        app.fragments_for(index).encode(ids, solved)
+
+    return [
+        ("parse_contests", lambda: codeforces.contest_map_from(
+            [[c["id"], c.get("name", "")] for c in json.loads(contests_body)["result"]])),
+        ("parse_problemset", lambda: codeforces.problemset_from(json.loads(problems_body)["result"])),
+        ("build_index", lambda: ProblemIndex.from_problems(problems, solved_map, contest_map)),
+        ("filter_and_annotate", lambda: cli.filter_and_annotate(
+            index, ["div2", "div3"], ["A", "B", "C"], None, 800, 2000, solved)),
+        ("select_ids", lambda: cli.select_ids(index, [], ["A", "B", "C", "D", "E", "F"], None, 800, 3500, solved)),
+        ("ladder_body", ladder_body),
+        ("recommend_top50", lambda: recommend.recommend(index, wide, solved, 1500, 50)),
+        ("write_csv", lambda: cli.write_csv(os.path.join(outdir, "l.csv"), cli.iter_rows(index, wide))),
+        ("write_html", lambda: cli.write_html(os.path.join(outdir, "l.html"), cli.iter_rows(index, wide), "bench")),
+    ]
+
+
+def main():
+    p = argparse.ArgumentParser(description="Ladder micro-benchmarks.")
+    p.add_argument("--scales", type=float, nargs="+", default=[1, 10])
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--only", nargs="*", help="Run only these cases")
+    p.add_argument("--baseline", default=BASELINE)
+    p.add_argument("--save", action="store_true", help="Overwrite the baseline with these results")
+    args = p.parse_args()
+
+    reference = common.reference_seconds()
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="cf-bench-") as outdir:
+        for scale in args.scales:
+            fx = synthetic(scale)
+            for name, fn in cases(fx, outdir):
+                if args.only and name not in args.only:
+                    continue
+                results[f"{name}@x{scale:g}"] = {"seconds": best_of(args.repeat, fn)}
+    if args.save:
+        common.save(args.baseline, results, reference)
+        print(f"Saved {len(results)} results to {args.baseline}")
+        return
+    sys.exit(0 if common.compare(args.baseline, results, reference) else 1)
+
+
+if __name__ == "__main__":
+    main()
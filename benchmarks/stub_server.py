@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# benchmarks/stub_server.py
+"""
+Local stand-in for the Codeforces API, replaying fixtures (see fixtures.py).
+
+Serves contest.list, problemset.problems, user.status (with from/count
+paging) and user.info under /api/. --latency adds a delay to every response and
+--throttle-every N answers every Nth call with the 503 "Call limit exceeded"
+that Codeforces sends to clients calling too fast. Point the backend at it
+with CF_API_BASE:
+
+  python benchmarks/stub_server.py --fixtures fixtures.json.gz --port 8081 --latency 0.2
+  CF_API_BASE=http://127.0.0.1:8081/api CF_RATE=1000 python backend/app.py
+"""
+
+import argparse
+import itertools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from fixtures import load, synthetic
+
+
+class StubAPI:
+    def __init__(self, fixtures: dict, latency: float = 0.0, throttle_every: int = 0):
+        self.latency = latency
+        self.throttle_every = throttle_every
+        self._calls = itertools.count(1)
+        self._lock = threading.Lock()
+        # the large results are encoded once and replayed as bytes
+        self._static = {m: self._ok(fixtures[m]) for m in ("contest.list", "problemset.problems")}
+        self._status = {h.lower(): subs for h, subs in fixtures["user.status"].items()}
+        self._info = {h.lower(): user for h, user in fixtures.get("user.info", {}).items()}
+        self.counts = {}
+
+    @staticmethod
+    def _ok(result) -> bytes:
+        return json.dumps({"status": "OK", "result": result}).encode("utf-8")
+
+    @staticmethod
+    def _not_found(handle: str):
+        return 400, json.dumps({"status": "FAILED", "comment": f"handle: User with handle {handle} not found"}).encode("utf-8")
+
+    def respond(self, method: str, params: dict):
+        """(HTTP status, body) for one API call."""
+        with self._lock:
+            n = next(self._calls)
+            self.counts[method] = self.counts.get(method, 0) + 1
+        if self.latency:
+            time.sleep(self.latency)
+        if self.throttle_every and n % self.throttle_every == 0:
+            return 503, json.dumps({"status": "FAILED", "comment": "Call limit exceeded"}).encode("utf-8")
+        if method in self._static:
+            return 200, self._static[method]
+        if method == "user.info":
+            handle = params.get("handles", "").lower()
+            if handle not in self._status:
+                return self._not_found(handle)
+            return 200, self._ok([self._info.get(handle, {"handle": handle})])
+        if method == "user.status":
+            handle = params.get("handle", "").lower()
+            if handle not in self._status:
+                return self._not_found(handle)
+            subs = self._status[handle]
+            if "from" in params:
+                start = int(params["from"]) - 1
+                subs = subs[start:start + int(params.get("count", len(subs)))]
+            return 200, self._ok(subs)
+        return 404, json.dumps({"status": "FAILED", "comment": f"Unknown method {method}"}).encode("utf-8")
+
+
+def make_server(api: StubAPI, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            status, body = api.respond(url.path.rsplit("/", 1)[-1], params)
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    return server
+
+
+def start(fixtures: dict, latency: float = 0.0, throttle_every: int = 0):
+    """Run a stub in a background thread; returns (server, api base URL)."""
+    server = make_server(StubAPI(fixtures, latency, throttle_every))
+    threading.Thread(target=server.serve_forever, name="cf-stub", daemon=True).start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}/api"
+
+
+def main():
+    p = argparse.ArgumentParser(description="Serve Codeforces API fixtures locally.")
+    p.add_argument("--fixtures", help="Fixture file (default: synthetic data at --scale)")
+    p.add_argument("--scale", type=float, default=1.0)
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8081)
+    p.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    p.add_argument("--throttle-every", type=int, default=0, metavar="N", help="Answer every Nth call with 503")
+    args = p.parse_args()
+    fixtures = load(args.fixtures) if args.fixtures else synthetic(args.scale)
+    server = make_server(StubAPI(fixtures, args.latency, args.throttle_every), args.host, args.port)
+    print(f"Serving Codeforces API stand-in on http://{args.host}:{args.port}/api")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+# tests/conftest.py
+"""
+Shared setup: backend/ and benchmarks/ (for the synthetic Codeforces data)
+on sys.path, and an environment in which the app talks to a local stub of
+the Codeforces API (benchmarks/stub_server.py) serving that data, without
+rate limiting, and never touches a real snapshot.
+
+  python -m pytest -q
+"""
+
+import os
+import sys
+import tempfile
+import threading
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, "backend"), os.path.join(ROOT, "benchmarks")]
+
+import stub_server  # noqa: E402
+from fixtures import synthetic  # noqa: E402
+
+# a small deterministic contest.list / problemset.problems / user.status / user.info set
+FIXTURES = synthetic(0.05)
+STUB = stub_server.StubAPI(FIXTURES)
+_server = stub_server.make_server(STUB)
+threading.Thread(target=_server.serve_forever, name="cf-stub", daemon=True).start()
+
+_tmp = tempfile.mkdtemp(prefix="cf-tests-")
+os.environ.update({
+    "CF_API_BASE": "http://{}:{}/api".format(*_server.server_address[:2]),
+    "CF_SNAPSHOT": os.path.join(_tmp, "snapshot.bin"),
+    "CF_RATE_STATE": os.path.join(_tmp, "rate"),
+    "CF_RATE": "1000",
+    "CF_RATE_BURST": "1000",
+})
+
+
+@pytest.fixture(scope="session")
+def fx() -> dict:
+    return FIXTURES
+
+
+@pytest.fixture
+def stub() -> stub_server.StubAPI:
+    return STUB
+
+
+@pytest.fixture
+def client():
+    import app
+    return app.app.test_client()
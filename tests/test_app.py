@@ -0,0 +1,144 @@
+# tests/test_app.py
+import copy
+import gzip
+import json
+import threading
+import time
+
+import pytest
+
+import app
+import codeforces
+from cache import TTLCache, _Flight
+from recommend import DEFAULT_LIMIT
+from scheduler import scheduler
+
+
+def rows(resp):
+    assert resp.status_code == 200, resp.get_data(as_text=True)
+    return resp.get_json()
+
+
+def test_paging_slices_the_full_ladder(client):
+    everything = client.get("/api/ladder?min=1200&max=1600")
+    full = rows(everything)
+    assert int(everything.headers["X-Total-Count"]) == len(full) > 30
+    page = client.get("/api/ladder?min=1200&max=1600&offset=10&limit=20")
+    assert rows(page) == full[10:30]
+    assert page.headers["X-Total-Count"] == everything.headers["X-Total-Count"]
+    assert rows(client.get(f"/api/ladder?min=1200&max=1600&offset={len(full)}")) == []
+
+
+def test_fields_project_each_row(client):
+    full = rows(client.get("/api/ladder?limit=5"))
+    projected = rows(client.get("/api/ladder?limit=5&fields=name,link"))
+    assert projected == [{"name": r["name"], "link": r["link"]} for r in full]
+
+
+@pytest.mark.parametrize("path", [
+    "/api/ladder?min=abc",
+    "/api/ladder?fields=name,nope",
+    "/api/ladder?stream=xml",
+    "/api/ladder?sort=recommended",
+    "/api/team_ladder",
+    "/api/team_ladder?handles=alice,bob&solved_by=atleast&k=3",
+    "/api/team_ladder?handles=alice&solved_by=some",
+    "/api/team_ladder?handles=alice&sort=recommended",
+])
+def test_malformed_queries_are_400(client, path):
+    resp = client.get(path)
+    assert resp.status_code == 400
+    assert resp.get_json()["error"]
+    assert "Server-Timing" in resp.headers   # answered through finish(), like every other response
+
+
+def test_matching_etag_is_304(client):
+    first = client.get("/api/ladder?handle=alice&limit=10")
+    etag = first.headers["ETag"]
+    again = client.get("/api/ladder?handle=alice&limit=10", headers={"If-None-Match": etag})
+    assert again.status_code == 304 and again.get_data() == b""
+    other = client.get("/api/ladder?handle=alice&limit=11", headers={"If-None-Match": etag})
+    assert other.status_code == 200 and other.headers["ETag"] != etag
+
+
+def test_gzip_body_decodes_to_the_identity_body(client):
+    plain = client.get("/api/ladder?min=800&max=1500")
+    packed = client.get("/api/ladder?min=800&max=1500", headers={"Accept-Encoding": "gzip"})
+    assert packed.headers["Content-Encoding"] == "gzip" and "Content-Encoding" not in plain.headers
+    assert packed.headers["ETag"] != plain.headers["ETag"]   # one representation per encoding
+    assert gzip.decompress(packed.get_data()) == plain.get_data()
+
+
+def test_streamed_bodies_match_the_buffered_one(client):
+    plain = client.get("/api/ladder?handle=bob&min=800&max=2000").get_data()
+    streamed = client.get("/api/ladder?handle=bob&min=800&max=2000&stream=json")
+    assert streamed.get_data() == plain
+    lines = client.get("/api/ladder?handle=bob&min=800&max=2000&stream=ndjson").get_data().splitlines()
+    assert [json.loads(line) for line in lines] == json.loads(plain)
+
+
+def test_team_ladder_combines_the_handles(client):
+    def solved(path):
+        return {(r["contestId"], r["index"]) for r in rows(client.get(path)) if r["solved"]}
+    everything = {(r["contestId"], r["index"]) for r in rows(client.get("/api/ladder"))}
+    alice, bob = solved("/api/ladder?handle=alice"), solved("/api/ladder?handle=bob")
+    assert solved("/api/team_ladder?handles=alice,bob&solved_by=any") == alice | bob
+    assert {(r["contestId"], r["index"]) for r in rows(client.get(
+        "/api/team_ladder?handles=alice,bob&solved_by=all"))} == alice & bob
+    assert {(r["contestId"], r["index"]) for r in rows(client.get(
+        "/api/team_ladder?handles=alice,bob"))} == everything - alice - bob
+
+
+def test_recommendations_are_unsolved_and_short(client):
+    picks = rows(client.get("/api/ladder?handle=carol&sort=recommended"))
+    assert 0 < len(picks) <= DEFAULT_LIMIT
+    assert not any(r["solved"] for r in picks)
+    assert rows(client.get("/api/ladder?handle=carol&sort=recommended&limit=5")) == picks[:5]
+
+
+def test_failing_team_request_does_not_delay_other_requests(client, stub, monkeypatch):
+    assert client.get("/api/ladder?limit=1").status_code == 200   # snapshot caches warm
+    # a real rate limit: each team handle waits its turn for a token
+    monkeypatch.setattr(scheduler.limiter, "rate", 4.0)
+    monkeypatch.setattr(scheduler.limiter, "burst", 1.0)
+    calls_before = stub.counts.get("user.status", 0)
+    handles = ",".join(f"ghost{i}" for i in range(30))   # unknown to the stub: each lookup fails
+    team = {}
+
+    def team_request():
+        team["status"] = client.application.test_client().get(f"/api/team_ladder?handles={handles}").status_code
+    t = threading.Thread(target=team_request)
+    t.start()
+    time.sleep(0.1)
+    t0 = time.perf_counter()
+    assert client.get("/api/ladder?limit=5").status_code == 200
+    assert time.perf_counter() - t0 < 1.0
+    t.join(5)
+    assert team["status"] == 500
+
+    # the failure dropped the other lookups instead of letting them spend tokens
+    time.sleep(0.5)
+    assert scheduler.stats()["queued"] == 0
+    assert stub.counts["user.status"] - calls_before < 8
+
+
+def test_index_is_keyed_on_the_data_it_was_built_from(fx, monkeypatch):
+    contest_map = codeforces.contest_map_from([[c["id"], c["name"]] for c in fx["contest.list"]])
+    changed = copy.deepcopy(fx["problemset.problems"])
+    changed["problems"][0]["name"] = "Renamed"
+    problemsets = iter([fx["problemset.problems"], changed])
+    problemset_cache = TTLCache(lambda: codeforces.problemset_from(copy.deepcopy(next(problemsets))), 3600)
+    monkeypatch.setattr(app, "contests_cache", TTLCache(lambda: contest_map, 3600))
+    monkeypatch.setattr(app, "problemset_cache", problemset_cache)
+    monkeypatch.setattr(app, "_index", None)
+    monkeypatch.setattr(app, "_index_key", None)
+    read = problemset_cache.get_versioned
+
+    def read_then_refresh():
+        value = read()
+        problemset_cache._load(_Flight())   # a refresh lands before the index is built
+        return value
+    monkeypatch.setattr(problemset_cache, "get_versioned", read_then_refresh)
+    assert "Renamed" not in app.current_index().names
+    monkeypatch.setattr(problemset_cache, "get_versioned", read)
+    assert "Renamed" in app.current_index().names
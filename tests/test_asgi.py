@@ -0,0 +1,70 @@
+# tests/test_asgi.py
+import asyncio
+import json
+import threading
+
+import asgi
+import upstream
+from scheduler import scheduler
+
+
+async def _get(query: str):
+    sent = []
+
+    async def receive():
+        await asyncio.sleep(3600)   # the client stays connected
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/api/ladder", "query_string": query.encode(), "headers": []}
+    try:
+        await asgi.application(scope, receive, send)
+    finally:
+        await upstream.async_upstream.aclose()
+    headers = dict(sent[0]["headers"])
+    return sent[0]["status"], headers, b"".join(m.get("body", b"") for m in sent[1:])
+
+
+def get(query: str):
+    return asyncio.run(_get(query))
+
+
+def test_ladder_answers_like_the_flask_view(client):
+    status, headers, body = get("handle=alice&min=900&max=1300&limit=20")
+    expected = client.get("/api/ladder?handle=alice&min=900&max=1300&limit=20")
+    assert status == 200 and body == expected.get_data()
+    assert headers[b"etag"].decode() == expected.headers["ETag"]
+    assert get("min=oops")[0] == 400
+
+
+def test_slow_upstream_is_answered_by_the_deadline(client, stub, monkeypatch):
+    assert client.get("/api/ladder?limit=1").status_code == 200   # snapshot caches warm
+    monkeypatch.setattr(asgi, "DEADLINE", 0.3)
+    monkeypatch.setattr(stub, "latency", 2.0)
+    status, headers, body = get("handle=dave")
+    assert status == 504
+    assert json.loads(body)["stage"] == "solved"
+    assert b"server-timing" in headers
+
+
+def test_no_token_before_the_deadline_is_503(client, monkeypatch):
+    assert client.get("/api/ladder?limit=1").status_code == 200
+    monkeypatch.setattr(asgi, "DEADLINE", 0.5)
+    monkeypatch.setattr(scheduler.limiter, "rate", 0.1)
+    monkeypatch.setattr(scheduler.limiter, "burst", 1.0)
+    scheduler.limiter.reserve()   # spends the only token: the next one is ten seconds away
+    status, _, body = get("handle=erin")
+    assert status == 503
+    assert "rate limit" in json.loads(body)["error"]
+
+
+def test_rate_limit_tokens_are_taken_off_the_event_loop(monkeypatch):
+    reserve, threads = scheduler.limiter.reserve, []
+
+    def recorded(*args, **kwargs):
+        threads.append(threading.current_thread())
+        return reserve(*args, **kwargs)
+    monkeypatch.setattr(scheduler.limiter, "reserve", recorded)
+    assert get("handle=bob&limit=1")[0] == 200   # bob is synced by no other test here
+    assert threads and threading.main_thread() not in threads
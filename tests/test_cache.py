@@ -0,0 +1,82 @@
+# tests/test_cache.py
+import threading
+import time
+
+import pytest
+
+from cache import ResultCache, TTLCache
+
+
+class Loader:
+    """Counts calls; each returns the call number after ``delay`` seconds, or raises once ``fail`` is set."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = 0
+        self.fail = False
+
+    def __call__(self):
+        self.calls += 1
+        n = self.calls
+        time.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("codeforces is down")
+        return n
+
+
+def test_cold_callers_share_one_load():
+    loader = Loader(delay=0.2)
+    cache = TTLCache(loader, ttl=60)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get())) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert loader.calls == 1 and results == [1] * 8
+    assert cache.get_versioned() == (1, 1)
+
+
+def test_expired_value_is_served_while_one_refresh_runs():
+    loader = Loader(delay=0.2)
+    cache = TTLCache(loader, ttl=0.05)
+    assert cache.get() == 1
+    time.sleep(0.1)
+    t0 = time.perf_counter()
+    assert [cache.get() for _ in range(5)] == [1] * 5   # stale, without waiting for the refresh
+    assert time.perf_counter() - t0 < 0.1
+    time.sleep(0.3)
+    assert loader.calls == 2
+    assert cache.get_versioned() == (2, 2)
+
+
+def test_failed_refresh_keeps_the_stale_value():
+    loader = Loader()
+    cache = TTLCache(loader, ttl=0.2)
+    cache.get()
+    loader.fail = True
+    time.sleep(0.25)
+    assert cache.get() == 1   # starts the refresh, which fails
+    time.sleep(0.05)
+    assert [cache.get() for _ in range(5)] == [1] * 5
+    assert loader.calls == 2   # retried after retry_after, not on every get
+
+
+def test_cold_failure_reaches_every_waiter():
+    loader = Loader(delay=0.1)
+    loader.fail = True
+    cache = TTLCache(loader, ttl=60)
+    with pytest.raises(ConnectionError):
+        cache.get()
+    assert not cache.loaded
+
+
+def test_advance_evicts_down_to_max_weight():
+    cache = ResultCache(max_weight=10, weigh=len)
+    for key in "abcde":
+        cache.get_or_compute(1, key, lambda: "xx")
+    assert cache.weight == 10
+    # every carried value grows: only the most recently used still fit
+    cache.advance(2, carry=lambda key, value: value * 2)
+    assert cache.weight <= 10 and list(cache._data) == ["d", "e"]
+    assert cache.get_or_compute(2, "e", lambda: "recomputed") == "xxxx"
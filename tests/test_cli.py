@@ -0,0 +1,38 @@
+# tests/test_cli.py
+import json
+import os
+
+import pytest
+
+import cf_division_ladder as cli
+import codeforces
+from problem_index import ProblemIndex
+
+
+@pytest.fixture(scope="module")
+def index(fx):
+    contest_map = codeforces.contest_map_from([[c["id"], c["name"]] for c in fx["contest.list"]])
+    problems, solved_map = codeforces.problemset_from(fx["problemset.problems"])
+    return ProblemIndex.from_problems(problems, solved_map, contest_map)
+
+
+def test_batch_rewrites_only_changed_files(tmp_path, index, capsys):
+    spec = tmp_path / "matrix.json"
+    spec.write_text(json.dumps({"indices": ["A", "B"], "ladders": [{"range": [800, 1200]}, {"rating": 1500}],
+                                "combined": {"range": [800, 1000]}}))
+    jobs = cli.load_matrix(str(spec), [], [], [])
+    outdir = str(tmp_path / "out")
+    cli.run_batch(index, jobs, set(), outdir, workers=1)
+    files = sorted(os.listdir(outdir))
+    assert f"{len(files)} written, 0 unchanged" in capsys.readouterr().out
+    mtimes = {f: os.stat(os.path.join(outdir, f)).st_mtime_ns for f in files}
+
+    tampered = os.path.join(outdir, files[0])
+    with open(tampered, "a", encoding="utf-8") as f:
+        f.write("edited\n")
+    cli.run_batch(index, jobs, set(), outdir, workers=1)
+    assert f"1 written, {len(files) - 1} unchanged" in capsys.readouterr().out
+    assert sorted(os.listdir(outdir)) == files   # no temp files left behind
+    assert {f: os.stat(os.path.join(outdir, f)).st_mtime_ns for f in files[1:]} == \
+        {f: mtimes[f] for f in files[1:]}
+    assert "edited" not in open(tampered, encoding="utf-8").read()
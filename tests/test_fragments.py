@@ -0,0 +1,43 @@
+# tests/test_fragments.py
+import pytest
+from flask import jsonify
+
+import app
+import codeforces
+from fragments import RowFragments
+from problem_index import ProblemIndex
+
+
+@pytest.fixture(scope="module")
+def index(fx):
+    contest_map = codeforces.contest_map_from([[c["id"], c["name"]] for c in fx["contest.list"]])
+    problems, solved_map = codeforces.problemset_from(fx["problemset.problems"])
+    return ProblemIndex.from_problems(problems, solved_map, contest_map)
+
+
+def jsonified(index, ids, solved_set, fields):
+    rows = []
+    for i in ids:
+        row = index.row(i)
+        row["solved"] = (row["contestId"], row["index"]) in solved_set
+        rows.append({f: row[f] for f in fields})
+    with app.app.app_context():
+        return jsonify(rows).get_data()
+
+
+@pytest.mark.parametrize("fields", [app.ROW_FIELDS, ("name", "solved", "tags"), ("link", "rating")])
+def test_fragments_match_jsonify(index, fields):
+    ids = list(range(0, index.size, 7))
+    solved_set = {(index.row(i)["contestId"], index.row(i)["index"]) for i in ids[::3]}
+    frags = RowFragments(index, fields)
+    expected = jsonified(index, ids, solved_set, fields)
+    assert frags.encode(ids, solved_set) == expected
+    assert frags.encode(ids, set()) == jsonified(index, ids, set(), fields)
+    assert b"".join(frags.stream(ids, solved_set, chunk=512)) == expected
+
+
+def test_ndjson_stream_has_one_row_per_line(index):
+    ids = list(range(50))
+    frags = RowFragments(index, app.ROW_FIELDS)
+    lines = b"".join(frags.stream(ids, set(), ndjson=True, chunk=256)).splitlines()
+    assert lines == list(frags.iter_rows(ids, set()))
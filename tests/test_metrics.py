@@ -0,0 +1,31 @@
+# tests/test_metrics.py
+import re
+import time
+
+import pytest
+
+import metrics
+
+
+def test_report_shares_count_top_level_stages_once():
+    timings = metrics.collect()
+    for name in ("contests", "problemset"):
+        with metrics.stage(name):
+            with metrics.stage(f"parse_{name}"):
+                time.sleep(0.02)
+    lines = timings.report().splitlines()
+    assert [line.split()[0] for line in lines] == ["contests", "parse_contests", "problemset", "parse_problemset"]
+    assert lines[1].startswith("    parse_contests") and "%" not in lines[1]
+    shares = [float(share) for share in re.findall(r"([\d.]+)%", "\n".join(lines))]
+    assert len(shares) == 2 and sum(shares) == pytest.approx(100, abs=0.2)
+
+
+def test_nested_stages_are_recorded_under_their_parent():
+    timings = metrics.collect()
+    with metrics.stage("outer"):
+        with metrics.stage("inner"):
+            pass
+    with metrics.stage("inner"):   # the first place a stage ran decides where it is listed
+        pass
+    assert timings.parents == {"inner": "outer", "outer": None}
+    assert [line.split()[0] for line in timings.report().splitlines()] == ["outer", "inner"]
@@ -0,0 +1,99 @@
+# tests/test_problem_index.py
+import copy
+
+import numpy as np
+import pytest
+
+import app
+import codeforces
+from problem_index import ProblemIndex, diff
+
+# (min, max, indices, sort, divisions, any_tags, all_tags, exclude_tags), as select_problems takes them
+QUERIES = [
+    (800, 3500, [], "solved", [], [], [], []),
+    (800, 1400, ["A", "B"], "solved", [], [], [], []),
+    (1200, 2000, [], "rating", ["div2"], [], [], []),
+    (800, 3500, ["C"], "newest", [], ["dp", "greedy"], [], []),
+    (1500, 3500, [], "oldest", [], [], ["math"], ["geometry"]),
+    (800, 2400, ["D", "E"], "rating", ["div1", "div2"], [], [], ["dp"]),
+    (2000, 2600, [], "solved", [], ["trees"], [], []),
+]
+
+
+def parsed(fx):
+    contest_map = codeforces.contest_map_from([[c["id"], c["name"]] for c in fx["contest.list"]])
+    problems, solved_map = codeforces.problemset_from(copy.deepcopy(fx["problemset.problems"]))
+    return problems, solved_map, contest_map
+
+
+def solve_counts(problems, solved_map):
+    # a few solve counts move: the order of "solved" ladders containing them may change
+    for p in problems[::40]:
+        key = (p["contestId"], p["index"])
+        solved_map[key] = solved_map.get(key, 0) + 5000
+
+
+def ratings(problems, solved_map):
+    for p in problems[5::60]:
+        p["rating"] = p.get("rating", 1500) + 100
+
+
+def new_contest(problems, solved_map):
+    # rows shift: every carried ladder has to be remapped
+    cid = max(p["contestId"] for p in problems) + 1
+    problems[:0] = [{"contestId": cid, "index": i, "name": f"New {i}", "rating": 1300, "tags": ["dp"]}
+                    for i in ("A", "B", "C")]
+
+
+def removed_problems(problems, solved_map):
+    del problems[10:13]
+
+
+@pytest.mark.parametrize("change", [solve_counts, ratings, new_contest, removed_problems])
+def test_carried_ladders_equal_fresh_ones(fx, change):
+    problems, solved_map, contest_map = parsed(fx)
+    old = ProblemIndex.from_problems(problems, solved_map, contest_map)
+    old.generation = old.digest()
+    app.ladder_cache.advance(old.generation)
+    for q in QUERIES:
+        app.select_problems(old, *q)
+
+    problems, solved_map, _ = parsed(fx)
+    change(problems, solved_map)
+    new, delta = ProblemIndex.refreshed(old, problems, solved_map, contest_map)
+    new.generation = new.digest()
+    assert new.generation != old.generation
+    app.advance(old, new, delta)
+    carried = len(app.ladder_cache)
+    assert 0 < carried < len(QUERIES)   # both the carry and the recompute path are exercised
+
+    for q in QUERIES:
+        min_rating, max_rating, indices, sort_key, divisions, any_tags, all_tags, exclude_tags = q
+        fresh = new.ordered(codeforces.query_mask(new, min_rating, max_rating, indices, divisions,
+                                                  any_tags, all_tags, exclude_tags), sort_key)
+        np.testing.assert_array_equal(app.select_problems(new, *q), fresh)
+
+
+def test_refreshed_index_matches_a_rebuilt_one(fx):
+    problems, solved_map, contest_map = parsed(fx)
+    old = ProblemIndex.from_problems(problems, solved_map, contest_map)
+    problems, solved_map, _ = parsed(fx)
+    solve_counts(problems, solved_map)
+    refreshed, delta = ProblemIndex.refreshed(old, problems, solved_map, contest_map)
+    rebuilt = ProblemIndex.from_problems(problems, solved_map, contest_map)
+    assert delta.same_layout and delta.summary()["solved_changed"] > 0
+    for key, order in rebuilt.orders.items():
+        np.testing.assert_array_equal(refreshed.orders[key], order)
+    assert refreshed.digest() == rebuilt.digest()
+
+
+def test_diff_maps_rows_by_problem(fx):
+    problems, solved_map, contest_map = parsed(fx)
+    old = ProblemIndex.from_problems(problems, solved_map, contest_map)
+    removed_problems(problems, solved_map)
+    new = ProblemIndex.from_problems(problems, solved_map, contest_map)
+    delta = diff(old, new)
+    assert not delta.same_layout
+    assert delta.summary()["removed"] == 3 and delta.summary()["added"] == 0
+    kept = np.flatnonzero(delta.row_map >= 0)
+    assert [old.row(i) for i in kept] == [new.row(j) for j in delta.row_map[kept]]
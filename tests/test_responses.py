@@ -0,0 +1,27 @@
+# tests/test_responses.py
+import os
+
+from responses import BodyCache
+
+
+def test_body_cache_is_bounded_by_bytes():
+    cache = BodyCache(max_bytes=3 * (1000 + BodyCache.ENTRY_OVERHEAD))
+    bodies = {f"e{i}": os.urandom(1000) for i in range(5)}   # incompressible: stored at full size
+    for etag, body in bodies.items():
+        cache.encode_and_put(etag, "gzip", body, {})
+    assert len(cache) == 2 and cache.bytes <= cache.max_bytes
+    assert cache.get("e0", "gzip") is None
+    assert cache.get("e4", "gzip")[1] == "gzip"
+    cache.encode_and_put("huge", "gzip", os.urandom(10_000), {})
+    assert cache.get("huge", "gzip") is None and cache.get("e4", "gzip") is not None
+
+
+def test_personal_bodies_are_kept_only_when_compressed():
+    cache = BodyCache(max_bytes=1 << 20)
+    body = b'{"rows":[' + b'{"solved":false},' * 100 + b"]}"
+    assert cache.encode_and_put("mine", "identity", body, {}, personal=True) == (body, "identity", {})
+    assert cache.get("mine", "identity") is None
+    cache.encode_and_put("mine", "gzip", body, {}, personal=True)
+    assert cache.get("mine", "gzip")[1] == "gzip"
+    cache.encode_and_put("anyone", "identity", body, {})
+    assert cache.get("anyone", "identity") is not None
@@ -0,0 +1,25 @@
+# tests/test_root_api.py
+import importlib.util
+import os
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# the root module shares its name with the backend CLI, which is first on sys.path here
+_spec = importlib.util.spec_from_file_location("root_cf_division_ladder", os.path.join(ROOT, "cf_division_ladder.py"))
+root = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(root)
+
+
+def test_helpers_compose_into_fetch_ladder():
+    contest_map = root.fetch_contests()
+    problems, solved_map = root.fetch_problemset()
+    solved = root.fetch_solved_problems("alice")
+    rows = root.filter_and_annotate(problems, solved_map, contest_map, ["div2"], ["A", "B"], None, 800, 1600, solved)
+    assert rows and all((r["contestId"], r["index"]) not in solved for r in rows)
+    assert root.sort_rows(rows, "rating") == root.fetch_ladder("alice", ["div2"], ["A", "B"], None, 800, 1600, "rating")
+
+
+def test_detect_division_from_contest_name():
+    assert root.detect_division_from_contest_name("Codeforces Round 900 (Div. 3)") == "div3"
+    assert root.detect_division_from_contest_name("Codeforces Round (Div. 1 + Div. 2)") == "div1"
+    assert root.detect_division_from_contest_name("") is None
+    assert root.detect_division_from_contest_name("April Fools Day Contest") is None
@@ -0,0 +1,73 @@
+# tests/test_scheduler.py
+import threading
+import time
+
+import pytest
+
+from scheduler import Abandoned, RateLimiter, Scheduler
+
+
+def test_bucket_spends_the_burst_then_spaces_calls(tmp_path):
+    limiter = RateLimiter(str(tmp_path / "rate"), rate=10, burst=2)
+    waits = [limiter.reserve() for _ in range(4)]
+    assert waits[:2] == [0.0, 0.0]
+    assert waits[2] == pytest.approx(0.1, abs=0.02)
+    assert waits[3] == pytest.approx(0.2, abs=0.02)
+
+
+def test_reserve_does_not_take_a_token_past_max_wait(tmp_path):
+    limiter = RateLimiter(str(tmp_path / "rate"), rate=1, burst=1)
+    assert limiter.reserve() == 0.0
+    assert limiter.reserve(max_wait=0.5) is None
+    assert limiter.reserve(max_wait=2) == pytest.approx(1.0, abs=0.05)
+
+
+def test_bucket_is_shared_through_the_state_file(tmp_path):
+    path = str(tmp_path / "rate")
+    a, b = RateLimiter(path, rate=2, burst=1), RateLimiter(path, rate=2, burst=1)
+    assert a.reserve() == 0.0
+    assert b.reserve() == pytest.approx(0.5, abs=0.05)
+
+
+def test_identical_calls_share_one_run(tmp_path):
+    scheduler = Scheduler(RateLimiter(str(tmp_path / "rate"), rate=1000, burst=1000), workers=2)
+    release, runs = threading.Event(), []
+
+    def call():
+        runs.append(1)
+        release.wait(5)
+        return len(runs)
+
+    futures = [scheduler.submit("key", call) for _ in range(3)]
+    other = scheduler.submit("other", lambda: "other")
+    assert futures[1] is futures[0] and futures[2] is futures[0]
+    release.set()
+    assert [f.result(5) for f in futures] == [1, 1, 1]
+    assert other.result(5) == "other"
+    assert scheduler.stats()["deduplicated"] == 2
+    # once finished, the same key runs again
+    assert scheduler.call("key", call) == 2
+
+
+def test_abandoned_queued_call_never_runs(tmp_path):
+    limiter = RateLimiter(str(tmp_path / "rate"), rate=1, burst=1)
+    scheduler = Scheduler(limiter, workers=1)
+    assert scheduler.call("first", lambda: 1) == 1   # spends the only token
+    abandon, runs = threading.Event(), []
+    threading.Timer(0.2, abandon.set).start()
+    with pytest.raises(Abandoned):
+        scheduler.call("second", lambda: runs.append(1), abandon=abandon)
+    assert scheduler.stats()["queued"] == 0
+    time.sleep(1.2)   # past the moment the dropped call would have run
+    assert runs == []
+
+
+def test_shared_call_survives_one_caller_leaving(tmp_path):
+    scheduler = Scheduler(RateLimiter(str(tmp_path / "rate"), rate=2, burst=1))
+    scheduler.call("warm", lambda: None)
+    kept = scheduler.submit("key", lambda: "done")
+    abandon = threading.Event()
+    abandon.set()
+    with pytest.raises(Abandoned):
+        scheduler.call("key", lambda: "other", abandon=abandon)
+    assert kept.result(5) == "done"
@@ -0,0 +1,129 @@
+# tests/test_snapshot.py
+import gzip
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pytest
+
+import app
+import codeforces
+import shared_snapshot
+import snapshot
+from problem_index import ProblemIndex
+
+
+def test_sections_round_trip(tmp_path, fx):
+    path = str(tmp_path / "snapshot.bin")
+    before = time.time()
+    snapshot.save_section(path, "contests", fx["contest.list"])
+    snapshot.save_section(path, "problemset", fx["problemset.problems"])
+    data, saved_at = snapshot.load_section(path, "contests")
+    assert data == fx["contest.list"]
+    assert before <= saved_at <= time.time()
+    assert snapshot.load(path)["problemset"]["data"] == fx["problemset.problems"]
+    assert snapshot.load_section(path, "missing") == (None, None)
+
+
+@pytest.mark.parametrize("content", [b"", b"CFSNAP\x00\x01not gzip", b"NOTCFS\x00\x01"])
+def test_unreadable_snapshot_is_empty(tmp_path, content):
+    path = tmp_path / "snapshot.bin"
+    path.write_bytes(content)
+    assert snapshot.load(str(path)) == {}
+
+
+def test_fetch_through_falls_back_to_the_stored_copy(tmp_path):
+    path = str(tmp_path / "snapshot.bin")
+    assert snapshot.fetch_through(path, "contests", lambda: [[1, "Round 1"]]) == [[1, "Round 1"]]
+
+    def down():
+        raise ConnectionError("codeforces is down")
+    assert snapshot.fetch_through(path, "contests", down) == [[1, "Round 1"]]
+    assert snapshot.fetch_through(path, "contests", down, offline=True) == [[1, "Round 1"]]
+    with pytest.raises(ConnectionError):
+        snapshot.fetch_through(path, "problemset", down)
+
+
+
+def test_saving_a_section_copies_the_others_as_they_are(tmp_path, fx, monkeypatch):
+    path = str(tmp_path / "snapshot.bin")
+    snapshot.save_section(path, "problemset", fx["problemset.problems"])
+    stored = snapshot._read(path)["problemset"]
+    compressed = []
+    monkeypatch.setattr(snapshot, "_compress", lambda data: compressed.append(data) or gzip.compress(b"[]"))
+    snapshot.save_section(path, "contests", [])
+    assert compressed == [[]]
+    assert snapshot._read(path)["problemset"] == stored
+
+
+def test_version_1_snapshot_is_still_read(tmp_path):
+    path = tmp_path / "snapshot.bin"
+    sections = {"contests": {"saved_at": 1.5, "data": [[1, "Round 1"]]}}
+    path.write_bytes(b"CFSNAP\x00\x01" + gzip.compress(json.dumps(sections).encode()))
+    assert snapshot.load(str(path)) == sections
+    snapshot.save_section(str(path), "problemset", {"problems": []})
+    assert snapshot.load_section(str(path), "contests") == ([[1, "Round 1"]], 1.5)
+
+
+def test_failed_write_keeps_the_old_file_and_the_fetched_value(tmp_path, fx, monkeypatch):
+    path = str(tmp_path / "snapshot.bin")
+    snapshot.save_section(path, "contests", [[1, "Round 1"]])
+
+    def disk_full(fd):
+        raise OSError(28, "No space left on device")
+    monkeypatch.setattr(os, "fsync", disk_full)
+    with pytest.raises(OSError):
+        snapshot.save_section(path, "contests", [])
+    monkeypatch.setattr(app, "SNAPSHOT_PATH", path)
+    assert len(app.fetch_contests()) == len(fx["contest.list"])
+    assert snapshot.load_section(path, "contests")[0] == [[1, "Round 1"]]
+    assert sorted(os.listdir(tmp_path)) == ["snapshot.bin", "snapshot.bin.lock"]
+
+
+def _write_sections(path, worker):
+    for i in range(10):
+        snapshot.save_section(path, f"worker{worker}", list(range(i, i + 500)))
+
+
+def test_concurrent_writers_keep_every_section(tmp_path):
+    path = str(tmp_path / "snapshot.bin")
+    procs = [multiprocessing.Process(target=_write_sections, args=(path, w)) for w in range(4)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+    assert sorted(snapshot.load(path)) == [f"worker{w}" for w in range(4)]
+
+
+def test_shared_snapshot_round_trip(tmp_path, fx):
+    contest_map = codeforces.contest_map_from([[c["id"], c["name"]] for c in fx["contest.list"]])
+    problems, solved_map = codeforces.problemset_from(fx["problemset.problems"])
+    index = ProblemIndex.from_problems(problems, solved_map, contest_map)
+    path = str(tmp_path / "shared.bin")
+    shared_snapshot.write(path, index, 7)
+    generation, mapped = shared_snapshot.read(path)
+    assert generation == 7
+    assert mapped.generation == index.digest() == mapped.digest()
+    assert [mapped.row(i) for i in range(mapped.size)] == [index.row(i) for i in range(index.size)]
+    for key, order in index.orders.items():
+        np.testing.assert_array_equal(mapped.orders[key], order)
+
+
+def test_shared_mode_cold_start_is_seeded_from_the_snapshot(tmp_path, fx):
+    path = str(tmp_path / "snapshot.bin")
+    snapshot.save_section(path, "contests", [[c["id"], c["name"]] for c in fx["contest.list"]])
+    snapshot.save_section(path, "problemset", fx["problemset.problems"])
+    env = dict(os.environ, CF_API_BASE="http://127.0.0.1:9/api",   # Codeforces is unreachable
+               CF_SNAPSHOT=path, CF_SHARED_SNAPSHOT=str(tmp_path / "shared.bin"))
+    code = ("import app; r = app.app.test_client().get('/api/ladder?limit=3'); "
+            "print(r.status_code, len(r.get_json()))")
+    out = subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(app.__file__), env=env,
+                         capture_output=True, text=True, timeout=60)
+    assert out.stdout.split() == ["200", "3"], out.stderr
+    # dated like the data it holds (contests were saved first), not as a fresh publish
+    assert os.stat(tmp_path / "shared.bin").st_mtime == pytest.approx(snapshot.load_section(path, "contests")[1],
+                                                                       abs=1e-3)
@@ -0,0 +1,97 @@
+# tests/test_submissions.py
+import asyncio
+import threading
+import time
+
+from submissions import EMPTY_VERSION, AsyncSolvedSets, SolvedSets
+
+
+def sub(sid, contest_id, index, verdict="OK"):
+    return {"id": sid, "verdict": verdict, "problem": {"contestId": contest_id, "index": index}}
+
+
+class Feed:
+    """user.status stand-in: submissions newest first, paged like the real API."""
+
+    def __init__(self, *subs, delay=0.0):
+        self.subs = list(subs)
+        self.delay = delay
+        self.calls = []
+
+    def push(self, *subs):
+        self.subs[:0] = subs
+
+    def __call__(self, handle, start, count):
+        self.calls.append((start, count))
+        time.sleep(self.delay)
+        return list(self.subs) if start is None else self.subs[start - 1:start - 1 + count]
+
+
+def test_incremental_sync_merges_without_double_counting():
+    feed = Feed(sub(3, 1, "A"), sub(2, 1, "A", "WRONG_ANSWER"), sub(1, 2, "B"))
+    sets = SolvedSets(feed, page_size=2, fresh_for=0)
+    solved, first = sets.get_versioned("h")
+    assert solved == {(1, "A"), (2, "B")}
+    assert feed.calls == [(None, None)]
+
+    feed.push(sub(5, 3, "C"), sub(4, 1, "A"))   # a new problem and a re-solve of 1A
+    solved, second = sets.get_versioned("H")     # handles are case-insensitive
+    assert solved == {(1, "A"), (2, "B"), (3, "C")}
+    assert second != first
+    # only the pages down to the watermark were read
+    assert feed.calls[1:] == [(1, 2), (3, 2)]
+
+    feed.push(sub(6, 2, "B"))   # nothing new solved
+    assert sets.get_versioned("h") == (solved, second)
+
+
+def test_pending_submission_is_applied_once_judged():
+    feed = Feed(sub(3, 1, "B", "TESTING"), sub(2, 1, "A"), sub(1, 1, "C", "WRONG_ANSWER"))
+    sets = SolvedSets(feed, page_size=10, fresh_for=0)
+    assert sets.get("h") == {(1, "A")}
+    feed.subs[0] = sub(3, 1, "B")   # judged
+    assert sets.get("h") == {(1, "A"), (1, "B")}
+
+
+def test_version_depends_on_the_set_only():
+    a = SolvedSets(Feed(sub(2, 1, "A"), sub(1, 2, "B")), fresh_for=0)
+    b = SolvedSets(Feed(sub(9, 2, "B"), sub(8, 1, "A", "WRONG_ANSWER"), sub(7, 1, "A")), fresh_for=0)
+    c = SolvedSets(Feed(sub(1, 1, "A")), fresh_for=0)
+    assert a.get_versioned("x")[1] == b.get_versioned("y")[1] != c.get_versioned("z")[1]
+    assert SolvedSets(Feed()).get_versioned("") == (set(), EMPTY_VERSION)
+
+
+def test_concurrent_lookups_share_one_sync():
+    feed = Feed(sub(1, 1, "A"), delay=0.2)
+    sets = SolvedSets(feed, fresh_for=0)
+    threads = [threading.Thread(target=sets.get, args=("h",)) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(feed.calls) == 1
+
+
+def test_fresh_handle_skips_upstream():
+    feed = Feed(sub(1, 1, "A"))
+    sets = SolvedSets(feed, fresh_for=60)
+    sets.get("h")
+    sets.get("h")
+    assert len(feed.calls) == 1
+
+
+def test_async_lookups_share_one_sync():
+    feed = Feed(sub(1, 1, "A"))
+
+    async def fetch_page(handle, start, count):
+        await asyncio.sleep(0.1)
+        return feed(handle, start, count)
+
+    async def main():
+        sets = AsyncSolvedSets(fetch_page, fresh_for=0)
+        return await asyncio.gather(*(sets.get_versioned("h") for _ in range(6)))
+
+    results = asyncio.run(main())
+    assert len(feed.calls) == 1
+    assert all(r == results[0] for r in results)
+    assert results[0][0] == {(1, "A")}